@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import threading
+import time
+from uuid import uuid4
 
 DB_USER = os.getenv("POSTGRES_USER", "oncall")
 DB_PASS = os.getenv("POSTGRES_PASSWORD", "oncall")
@@ -11,11 +16,139 @@ DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 DATABASE_URL = (
     f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# ----- connection pool -----
+# Sized per process: total connections = workers * (DB_POOL_SIZE +
+# DB_MAX_OVERFLOW), for each of the sync and async engines.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Liveness strategy for pooled connections:
+#   pre_ping - test every checkout with a round trip (safest, slowest)
+#   recycle  - no ping; replace connections older than DB_POOL_RECYCLE
+#              (defaults to 300s here), plus SQLAlchemy's invalidation of
+#              the whole pool on the first disconnect error
+#   none     - no ping, no recycling beyond DB_POOL_RECYCLE if set
+DB_POOL_LIVENESS = os.getenv("DB_POOL_LIVENESS", "pre_ping")
+DB_POOL_RECYCLE = int(
+    os.getenv("DB_POOL_RECYCLE", "300" if DB_POOL_LIVENESS == "recycle" else "-1")
+)
+# Server-side statement timeout in milliseconds (0 = none).
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Running behind pgbouncer in transaction mode: no prepared statement
+# caches (asyncpg) and no startup parameters (pgbouncer rejects them; set
+# statement_timeout on the role instead).
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+if DB_POOL_LIVENESS not in ("pre_ping", "recycle", "none"):
+    raise ValueError(f"Unknown DB_POOL_LIVENESS: {DB_POOL_LIVENESS}")
+if DB_PGBOUNCER and DB_STATEMENT_TIMEOUT_MS:
+    print("⚠️  DB_STATEMENT_TIMEOUT_MS is ignored with DB_PGBOUNCER=1; set it on the role.")
+
+
+class _TimedPoolMixin:
+    """Counts checkouts and time spent waiting for a connection (including
+    opening a new one), and checkout timeouts, for /db/pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+        return conn
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            checkouts = self.checkouts
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "idle": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow,
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / checkouts, 6) if checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_LIVENESS == "pre_ping",
+    }
+
+
+def _sync_connect_args() -> dict:
+    if DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+def _async_connect_args() -> dict:
+    args: dict = {}
+    if DB_PGBOUNCER:
+        # pgbouncer hands each transaction a different server connection,
+        # so named prepared statements cannot be reused
+        args["statement_cache_size"] = 0
+        args["prepared_statement_cache_size"] = 0
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    elif DB_STATEMENT_TIMEOUT_MS:
+        args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    return args
+
+
+def pool_config() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "liveness": DB_POOL_LIVENESS,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+        "pgbouncer": DB_PGBOUNCER,
+    }
+
 
 engine = create_engine(
     DATABASE_URL,
     future=True,
-    pool_pre_ping=True,  # helps avoid stale connections
+    poolclass=TimedQueuePool,
+    connect_args=_sync_connect_args(),
+    **_pool_kwargs(),
 )
 
 SessionLocal = sessionmaker(
@@ -25,6 +158,21 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+# asyncio stack for the hot read endpoints: these run on the event loop
+# instead of FastAPI's threadpool, so they are not capped by its size.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    connect_args=_async_connect_args(),
+    **_pool_kwargs(),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -35,3 +183,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
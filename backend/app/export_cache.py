@@ -0,0 +1,106 @@
+"""
+Byte-budgeted LRU cache of rendered export bodies.
+
+Keys are (schedule_id, format, schedule version). Because the version is
+part of the key, a mutated schedule can never be served stale; the
+repository still calls invalidate_schedule after mutations so superseded
+bodies stop counting against the budget right away. Per-person feeds use
+(("person", person_id), format, etag) and simply age out of the LRU.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Bodies larger than this are streamed but never cached.
+EXPORT_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv("EXPORT_CACHE_MAX_ENTRY_BYTES", str(EXPORT_CACHE_MAX_BYTES // 8))
+)
+
+CacheKey = Tuple[Hashable, str, Hashable]
+
+
+class ExportCache:
+    def __init__(
+        self,
+        max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+        max_entry_bytes: int = EXPORT_CACHE_MAX_ENTRY_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: CacheKey, body: bytes) -> None:
+        size = len(body)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = body
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def tee(self, key: CacheKey, chunks: Iterable[str]) -> Iterator[bytes]:
+        """
+        Pass rendered chunks through to the client and store the complete
+        body once the stream finishes. Gives up buffering as soon as the body
+        outgrows max_entry_bytes; an aborted stream is never stored.
+        """
+        parts = []
+        size = 0
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            if parts is not None:
+                size += len(data)
+                if size > self.max_entry_bytes:
+                    parts = None
+                else:
+                    parts.append(data)
+            yield data
+        if parts is not None:
+            self.put(key, b"".join(parts))
+
+    def invalidate_schedule(self, schedule_id: Hashable) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == schedule_id]:
+                self._bytes -= len(self._entries.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+export_cache = ExportCache()
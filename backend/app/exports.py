@@ -0,0 +1,204 @@
+"""
+Streaming renderers for schedule exports (CSV / Markdown / ICS).
+
+Rows come from SchedulesRepositoryDB.iter_export_rows, a joined query
+fetched in yield_per batches (a server-side cursor on Postgres). Output is
+emitted in chunks of EXPORT_BATCH_SIZE rows, so memory stays flat no matter
+how long the schedule is.
+"""
+import csv
+import os
+from datetime import date
+from io import StringIO
+from typing import Iterable, Iterator, List
+
+from .db import SessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "md": "text/markdown",
+    "ics": "text/calendar",
+}
+
+CSV_HEADER = [
+    "slot",
+    "start",
+    "end",
+    "primary_person_id",
+    "primary_name",
+    "primary_email",
+    "secondary_person_id",
+    "secondary_name",
+    "secondary_email",
+    "notes",
+]
+
+
+def export_headers(schedule_id: int, fmt: str) -> dict:
+    if fmt in ("csv", "ics"):
+        return {
+            "Content-Disposition": f"attachment; filename=schedule_{schedule_id}.{fmt}"
+        }
+    return {}
+
+
+def iter_csv(rows: Iterable, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    buf = StringIO()
+    writer = csv.writer(buf)
+    # include IDs + names + emails
+    writer.writerow(CSV_HEADER)
+    for n, r in enumerate(rows, 1):
+        writer.writerow(
+            [
+                r.slot,
+                r.start.isoformat(),
+                r.end.isoformat(),
+                r.primary_person_id,
+                r.primary_name or "",
+                r.primary_email or "",
+                r.secondary_person_id or "",
+                r.secondary_name or "",
+                r.secondary_email or "",
+                r.notes or "",
+            ]
+        )
+        if n % batch_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    yield buf.getvalue()
+
+
+def _person_label(person_id, name, email) -> str:
+    label = name or f"#{person_id}"
+    if email:
+        label = f"{label} <{email}>"
+    return label
+
+
+def iter_markdown(
+    schedule_id: int, rows: Iterable, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    yield "\n".join(
+        [
+            f"# Schedule {schedule_id}",
+            "",
+            "| Slot | Start | End | Primary | Secondary | Notes |",
+            "|------|-------|-----|---------|-----------|-------|",
+        ]
+    )
+    chunk: List[str] = []
+    for r in rows:
+        primary_label = _person_label(r.primary_person_id, r.primary_name, r.primary_email)
+        if r.secondary_person_id:
+            secondary_label = _person_label(
+                r.secondary_person_id, r.secondary_name, r.secondary_email
+            )
+        else:
+            secondary_label = ""
+        chunk.append(
+            f"\n| {r.slot} | {r.start.isoformat()} | {r.end.isoformat()} | "
+            f"{primary_label} | {secondary_label} | {r.notes or ''} |"
+        )
+        if len(chunk) >= batch_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _ics_date(d: date) -> str:
+    return d.strftime("%Y%m%d")
+
+
+def _ics_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 3.3.11)."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def iter_ics(
+    schedule_id: int, rows: Iterable, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    # basic all-day events
+    yield "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//OnCallScheduler//EN"
+    chunk: List[str] = []
+    for r in rows:
+        primary_label = r.primary_name or f"#{r.primary_person_id}"
+        chunk.append(
+            "\nBEGIN:VEVENT"
+            f"\nUID:{schedule_id}-{r.slot}@oncall"
+            f"\nDTSTART;VALUE=DATE:{_ics_date(r.start)}"
+            f"\nDTEND;VALUE=DATE:{_ics_date(r.end + date.resolution)}"  # exclusive end
+            f"\nSUMMARY:On-call slot {r.slot} (primary {primary_label})"
+            "\nEND:VEVENT"
+        )
+        if len(chunk) >= batch_size:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("\nEND:VCALENDAR")
+    yield "".join(chunk)
+
+
+def iter_person_ics(
+    person_id: int, person_name: str, rows: Iterable, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """One calendar of a person's shifts across schedules (rows from
+    SchedulesRepositoryDB.person_feed_rows)."""
+    yield (
+        "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//OnCallScheduler//EN"
+        f"\nX-WR-CALNAME:On-call: {_ics_text(person_name)}"
+    )
+    chunk: List[str] = []
+    for r in rows:
+        if r.primary_person_id == person_id:
+            role, partner = "primary", r.secondary_name
+        else:
+            role, partner = "secondary", r.primary_name
+        summary = f"On-call {role}: {r.team_name}"
+        if partner:
+            summary += f" (with {partner})"
+        chunk.append(
+            "\nBEGIN:VEVENT"
+            f"\nUID:{r.schedule_id}-{r.slot}-{role}@oncall"
+            f"\nDTSTART;VALUE=DATE:{_ics_date(r.start)}"
+            f"\nDTEND;VALUE=DATE:{_ics_date(r.end + date.resolution)}"  # exclusive end
+            f"\nSUMMARY:{_ics_text(summary)}"
+            "\nEND:VEVENT"
+        )
+        if len(chunk) >= batch_size:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("\nEND:VCALENDAR")
+    yield "".join(chunk)
+
+
+def render_export(schedule_id: int, fmt: str, rows: Iterable) -> Iterator[str]:
+    if fmt == "csv":
+        return iter_csv(rows)
+    if fmt == "md":
+        return iter_markdown(schedule_id, rows)
+    if fmt == "ics":
+        return iter_ics(schedule_id, rows)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def stream_export(schedule_id: int, fmt: str) -> Iterator[str]:
+    """
+    Generator for StreamingResponse. Owns its own session: the request's
+    session may already be closed by the time the body is sent.
+    """
+    from .repositories_db import SchedulesRepositoryDB
+
+    db = SessionLocal()
+    try:
+        rows = SchedulesRepositoryDB(db).iter_export_rows(schedule_id, EXPORT_BATCH_SIZE)
+        yield from render_export(schedule_id, fmt, rows)
+    finally:
+        db.close()
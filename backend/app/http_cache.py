@@ -0,0 +1,47 @@
+"""
+ETag / If-None-Match helpers for conditional GETs.
+
+Schedule ETags are derived from (schedule id, version) plus whatever else
+shapes the representation (export format, query window), so a 304 can be
+decided from the ScheduleDefinition row alone, before any slots are loaded.
+Per-person feeds combine the (id, version) pairs of every schedule they
+draw from.
+"""
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from .models_db import ScheduleDefinition
+
+
+def schedule_etag(schedule: ScheduleDefinition, *variant: object) -> str:
+    parts = [f"s{schedule.id}", f"v{schedule.version}"]
+    parts.extend(str(v) for v in variant if v is not None)
+    return '"' + "-".join(parts) + '"'
+
+
+def person_feed_etag(
+    person_id: int, schedules: Iterable[Tuple[int, int]], *variant: object
+) -> str:
+    digest = hashlib.sha1(
+        ",".join(f"{sid}:{version}" for sid, version in schedules).encode()
+    ).hexdigest()[:16]
+    parts = [f"p{person_id}", digest]
+    parts.extend(str(v) for v in variant if v is not None)
+    return '"' + "-".join(parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match (RFC 9110 13.1.2)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
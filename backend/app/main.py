@@ -1,11 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import OperationalError
+import asyncio
 import time
 
 
-from .db import Base, engine
-from .routers import people, teams, pto, schedules
+from .db import engine
+from .metrics import MetricsMiddleware
+from .migrations import ensure_schema
+from .notifications import email_configured, slack_configured
+from .outbox import OUTBOX_WORKER_ENABLED, outbox_worker
+from .query_budget import QUERY_DEBUG, QueryBudgetMiddleware
+from .reminders import REMINDERS_ENABLED, reminder_dispatcher
+from .scheduler import shutdown_generation_pool
+from .routers import people, teams, pto, schedules, ops
 
 from .seed import seed_initial_data
 
@@ -17,24 +25,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # pagination cursor and the validators clients send back as If-None-Match
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+if QUERY_DEBUG:
+    # inside MetricsMiddleware, so it shares the request's statement counts
+    app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(people.router)
 app.include_router(teams.router)
 app.include_router(pto.router)
 app.include_router(schedules.router)
+app.include_router(ops.router)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    """Wait for Postgres to be ready, then create tables."""
+    """Wait for Postgres to be ready, then check/upgrade the schema version."""
     max_attempts = 10
     delay_seconds = 3
 
     for attempt in range(1, max_attempts + 1):
         try:
-            Base.metadata.create_all(bind=engine)
-            print("✅ Database ready, tables ensured.")
+            ensure_schema(engine)
+            print("✅ Database ready, schema up to date.")
             break
         except OperationalError as e:
             print(
@@ -47,6 +62,23 @@ def on_startup() -> None:
     # Seed initial data (idempotent)
     seed_initial_data()
 
+
+@app.on_event("startup")
+async def start_background_jobs() -> None:
+    # after on_startup, so the schema is in place
+    if REMINDERS_ENABLED:
+        reminder_dispatcher.start()
+    if OUTBOX_WORKER_ENABLED and (email_configured() or slack_configured()):
+        outbox_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs() -> None:
+    await reminder_dispatcher.stop()
+    await outbox_worker.stop()
+    await asyncio.to_thread(shutdown_generation_pool)
+
+
 @app.get("/")
 def root():
     return {"status": "ok", "message": "On-call Scheduler API"}
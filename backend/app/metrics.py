@@ -0,0 +1,250 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+MetricsMiddleware (pure ASGI, no BaseHTTPMiddleware task/queue overhead)
+times each request and records it under the matched route template, so
+/schedules/1 and /schedules/2 share one series. SQLAlchemy cursor events,
+registered on the Engine class so they cover the sync engine and the sync
+side of the async engine, add statement count and DB time to the current
+request through a contextvar. Starlette copies the context into threadpool
+calls and SQLAlchemy's greenlets run in it, so sync and async routes are
+both attributed.
+
+Everything is kept in process memory behind one lock; with several worker
+processes each reports its own series (scrape each, or sum in Prometheus).
+"""
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Request latency histogram buckets, seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Queries-per-request histogram buckets.
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "shapes")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+        # statement shape -> count; only tracked when set to a dict (the
+        # query-budget middleware does this in QUERY_DEBUG mode)
+        self.shapes: Optional[Dict[str, int]] = None
+
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL text with IN-lists of any length collapsed, so statements that
+    differ only in bound values / list sizes compare equal."""
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("(...)", statement)).strip()
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None and context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None:
+        return
+    start = getattr(context, "_metrics_start", None)
+    if start is not None:
+        stats.db_seconds += time.perf_counter() - start
+    stats.queries += 1
+    if stats.shapes is not None:
+        shape = statement_shape(statement)
+        stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # counts are per bucket here and made cumulative on render
+        idx = bisect_left(self.buckets, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], _Histogram] = {}
+        self._queries: Dict[Tuple[str, str], _Histogram] = {}
+        self._db_seconds: Dict[Tuple[str, str], float] = {}
+        self._responses: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestStats
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = _Histogram(LATENCY_BUCKETS)
+                self._queries[key] = _Histogram(QUERY_BUCKETS)
+                self._db_seconds[key] = 0.0
+            latency.observe(seconds)
+            self._queries[key].observe(stats.queries)
+            self._db_seconds[key] += stats.db_seconds
+            status_key = (method, route, str(status))
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._queries.clear()
+            self._db_seconds.clear()
+            self._responses.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        with self._lock:
+            latency = {k: _copy(h) for k, h in self._latency.items()}
+            queries = {k: _copy(h) for k, h in self._queries.items()}
+            db_seconds = dict(self._db_seconds)
+            responses = dict(self._responses)
+
+        lines: List[str] = []
+        _render_histogram(
+            lines,
+            "http_request_duration_seconds",
+            "Request latency by route.",
+            latency,
+        )
+        lines.append("# HELP http_responses_total Responses by route and status code.")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), n in sorted(responses.items()):
+            lines.append(
+                f"http_responses_total{_labels(method=method, route=route, status=status)} {n}"
+            )
+        _render_histogram(
+            lines,
+            "http_request_db_queries",
+            "SQL statements executed per request, by route.",
+            queries,
+        )
+        lines.append("# HELP http_request_db_seconds_total Time spent in SQL statements, by route.")
+        lines.append("# TYPE http_request_db_seconds_total counter")
+        for (method, route), seconds in sorted(db_seconds.items()):
+            lines.append(
+                f"http_request_db_seconds_total{_labels(method=method, route=route)} {seconds:.6f}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _copy(h: _Histogram) -> _Histogram:
+    c = _Histogram(h.buckets)
+    c.counts = list(h.counts)
+    c.sum = h.sum
+    c.count = h.count
+    return c
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _render_histogram(
+    lines: List[str], name: str, help_text: str, series: Dict[Tuple[str, str], _Histogram]
+) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), h in sorted(series.items()):
+        cumulative = 0
+        for bound, n in zip(h.buckets, h.counts):
+            cumulative += n
+            lines.append(
+                f"{name}_bucket{_labels(method=method, route=route, le=f'{bound:g}')} {cumulative}"
+            )
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {h.sum:.6f}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+
+metrics_registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Records latency (until the last body chunk is sent, so streamed exports
+    count in full), status and SQL usage per request. Requests that match no
+    route are grouped under route="<unmatched>" to bound label cardinality.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            route = scope.get("route")
+            self.registry.observe(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status,
+                time.perf_counter() - start,
+                stats,
+            )
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
+            current_request.reset(token)
@@ -0,0 +1,419 @@
+"""
+Versioned schema migrations.
+
+Each Migration has an integer version and an upgrade(conn) callable. Applied
+versions are recorded in the schema_version table; `upgrade` applies every
+pending migration in order. On Postgres a session advisory lock serialises
+concurrent upgraders (e.g. several API workers starting at once). Behind
+pgbouncer in transaction mode (DB_PGBOUNCER=1) a session lock would be held
+by whichever server connection happened to run it, so each migration instead
+takes a transaction-scoped lock; migrations that cannot run in a transaction
+(CREATE INDEX CONCURRENTLY) must then be applied over a direct connection.
+
+Migrations must be idempotent (IF NOT EXISTS etc.) so they can be applied to
+databases that were created by the old `create_all` startup path.
+
+CLI (from backend/):
+
+    python -m app.migrations current
+    python -m app.migrations upgrade
+"""
+import os
+import sys
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+# Apply pending migrations on API startup. Turn off in production if
+# migrations are run as a separate deploy step.
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
+
+# Arbitrary constant key for pg_advisory_lock.
+_ADVISORY_LOCK_KEY = 7_420_001
+
+# Same switch as app.db: connections go through pgbouncer in transaction mode.
+_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+_version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+class Migration:
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        upgrade: Callable[[Connection], None],
+        transactional: bool = True,
+    ):
+        """
+        transactional=False runs upgrade on an AUTOCOMMIT connection, needed
+        for statements like CREATE INDEX CONCURRENTLY.
+        """
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+        self.transactional = transactional
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+# ----- helpers -----
+
+def _create_index(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    include: Sequence[str] = (),
+    where: Optional[str] = None,
+) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS, built CONCURRENTLY on Postgres so existing
+    production tables stay writable while the index is built.
+    """
+    cols = ", ".join(f'"{c}"' for c in columns)
+    if conn.dialect.name == "postgresql":
+        # A failed concurrent build leaves an INVALID index behind that
+        # IF NOT EXISTS would skip; drop it so a retry rebuilds it.
+        invalid = conn.execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        ).first()
+        if invalid:
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})"
+        if include:
+            sql += " INCLUDE (" + ", ".join(f'"{c}"' for c in include) + ")"
+    else:
+        sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.exec_driver_sql(sql)
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists (fresh
+    databases get it from the baseline create_all)."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+# ----- migrations -----
+
+# Schema as of migration 1: the tables the app created with create_all
+# before migrations existed. Frozen here (not Base.metadata) so that every
+# later change goes through its own migration and a fresh database passes
+# through the same states as an old one.
+_baseline_metadata = MetaData()
+
+Table(
+    "people",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(200), nullable=False),
+    Column("email", String(255), nullable=True),
+    Column("time_zone", String(64), nullable=True),
+)
+Table(
+    "teams",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(200), unique=True, nullable=False),
+    Column("description", Text, nullable=True),
+)
+Table(
+    "team_memberships",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("team_id", ForeignKey("teams.id"), nullable=False),
+    Column("person_id", ForeignKey("people.id"), nullable=False),
+    UniqueConstraint("team_id", "person_id", name="uix_team_person"),
+)
+Table(
+    "pto",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("person_id", ForeignKey("people.id"), nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date, nullable=False),
+    Column("reason", Text, nullable=True),
+)
+Table(
+    "schedule_definitions",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("team_id", ForeignKey("teams.id"), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("rotation_days", Integer, nullable=False),
+    Column("week_starts_on", Integer, nullable=False),
+    Column("custom_start_date", Date, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+)
+Table(
+    "oncall_slots",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("schedule_id", ForeignKey("schedule_definitions.id"), nullable=False),
+    Column("slot", Integer, nullable=False),
+    Column("start", Date, nullable=False),
+    Column("end", Date, nullable=False),
+    Column("primary_person_id", ForeignKey("people.id"), nullable=False),
+    Column("secondary_person_id", ForeignKey("people.id"), nullable=True),
+    Column("notes", Text, nullable=True),
+    Column("reminded", Boolean, nullable=False),
+    UniqueConstraint("schedule_id", "slot", name="uix_schedule_slot"),
+)
+
+
+def _m001_baseline(conn: Connection) -> None:
+    # No-op for tables that already exist, which is what makes this safe on
+    # pre-migration databases.
+    _baseline_metadata.create_all(conn)
+
+
+def _m002_hot_path_indexes(conn: Connection) -> None:
+    # on-call-now / date-window lookups; covering so the person ids come
+    # straight from the index on Postgres.
+    _create_index(
+        conn,
+        "ix_oncall_slots_schedule_start_end",
+        "oncall_slots",
+        ["schedule_id", "start", "end"],
+        include=["primary_person_id", "secondary_person_id"],
+    )
+    # person usage counts
+    _create_index(conn, "ix_oncall_slots_primary_person", "oncall_slots", ["primary_person_id"])
+    _create_index(conn, "ix_oncall_slots_secondary_person", "oncall_slots", ["secondary_person_id"])
+    # PTO overlap queries
+    _create_index(conn, "ix_pto_person_dates", "pto", ["person_id", "start_date", "end_date"])
+    # latest schedule for team/year
+    _create_index(
+        conn,
+        "ix_schedule_definitions_team_year_created",
+        "schedule_definitions",
+        ["team_id", "year", "created_at"],
+    )
+
+
+def _m003_schedule_version(conn: Connection) -> None:
+    _add_column(conn, "schedule_definitions", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _m004_slot_is_override(conn: Connection) -> None:
+    _add_column(conn, "oncall_slots", "is_override", "BOOLEAN NOT NULL DEFAULT FALSE")
+
+
+def _m005_unreminded_slots_index(conn: Connection) -> None:
+    # rows written before the column had a value everywhere would never
+    # match the partial index
+    conn.exec_driver_sql("UPDATE oncall_slots SET reminded = false WHERE reminded IS NULL")
+    _create_index(
+        conn,
+        "ix_oncall_slots_unreminded_start",
+        "oncall_slots",
+        ["start"],
+        where="reminded = false",
+    )
+
+
+_outbox_metadata = MetaData()
+
+_notification_outbox = Table(
+    "notification_outbox",
+    _outbox_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("channel", String(16), nullable=False),
+    Column("recipient", String(255), nullable=True),
+    Column("subject", String(255), nullable=True),
+    Column("body", Text, nullable=False),
+    Column("status", String(16), nullable=False, server_default="pending"),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("last_error", Text, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("sent_at", DateTime, nullable=True),
+    Index(
+        "ix_notification_outbox_pending_due",
+        "next_attempt_at",
+        postgresql_where=text("status = 'pending'"),
+        sqlite_where=text("status = 'pending'"),
+    ),
+)
+
+
+def _m006_notification_outbox(conn: Connection) -> None:
+    _notification_outbox.create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline tables", _m001_baseline),
+    Migration(2, "indexes for hot lookup queries", _m002_hot_path_indexes, transactional=False),
+    Migration(3, "schedule_definitions.version", _m003_schedule_version),
+    Migration(4, "oncall_slots.is_override", _m004_slot_is_override),
+    Migration(5, "index for unreminded slots", _m005_unreminded_slots_index, transactional=False),
+    Migration(6, "notification_outbox", _m006_notification_outbox),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ----- runner -----
+
+def current_version(engine: Engine) -> int:
+    """Highest applied migration, or 0 for a database that has none."""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_version.name):
+            return 0
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to target (default: latest). Returns the
+    versions that were applied."""
+    target = LATEST_VERSION if target is None else target
+    if _PGBOUNCER and engine.dialect.name == "postgresql":
+        return _upgrade_xact_locked(engine, target)
+    applied: List[int] = []
+
+    with engine.connect() as lock_conn:
+        is_pg = lock_conn.dialect.name == "postgresql"
+        if is_pg:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+            lock_conn.commit()
+        try:
+            _version_metadata.create_all(engine)
+            # Re-read under the lock: another worker may have just upgraded.
+            current = current_version(engine)
+            for m in MIGRATIONS:
+                if m.version <= current or m.version > target:
+                    continue
+                print(f"🔧 Applying migration {m.version}: {m.description}")
+                if m.transactional:
+                    with engine.begin() as conn:
+                        m.upgrade(conn)
+                        _record(conn, m)
+                else:
+                    with engine.connect() as raw:
+                        conn = raw.execution_options(isolation_level="AUTOCOMMIT")
+                        m.upgrade(conn)
+                        _record(conn, m)
+                applied.append(m.version)
+        finally:
+            if is_pg:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+                lock_conn.commit()
+    return applied
+
+
+def _upgrade_xact_locked(engine: Engine, target: int) -> List[int]:
+    """upgrade() for pgbouncer transaction mode: every step is one
+    transaction that takes pg_advisory_xact_lock and re-reads the version,
+    so no lock outlives the server connection it was taken on."""
+    lock = text("SELECT pg_advisory_xact_lock(:k)")
+    with engine.begin() as conn:
+        conn.execute(lock, {"k": _ADVISORY_LOCK_KEY})
+        _version_metadata.create_all(conn)
+
+    applied: List[int] = []
+    for m in MIGRATIONS:
+        if m.version > target:
+            break
+        with engine.begin() as conn:
+            conn.execute(lock, {"k": _ADVISORY_LOCK_KEY})
+            current = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+            if m.version <= current:
+                continue
+            if not m.transactional:
+                raise SchemaVersionError(
+                    f"Migration {m.version} ({m.description}) cannot run in a transaction, "
+                    "so it cannot be locked through pgbouncer. Run `python -m app.migrations "
+                    "upgrade` with POSTGRES_HOST/POSTGRES_PORT pointing directly at Postgres "
+                    "and DB_PGBOUNCER=0."
+                )
+            print(f"🔧 Applying migration {m.version}: {m.description}")
+            m.upgrade(conn)
+            _record(conn, m)
+        applied.append(m.version)
+    return applied
+
+
+def _record(conn: Connection, m: Migration) -> None:
+    conn.execute(
+        insert(schema_version).values(version=m.version, description=m.description)
+    )
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Startup check: bring the schema to LATEST_VERSION when AUTO_MIGRATE is on,
+    otherwise refuse to start against an out-of-date database.
+    """
+    current = current_version(engine)
+    if current == LATEST_VERSION:
+        return
+    if current > LATEST_VERSION:
+        print(
+            f"⚠️ Database schema version {current} is newer than this build "
+            f"({LATEST_VERSION}); continuing."
+        )
+        return
+    if not AUTO_MIGRATE:
+        raise SchemaVersionError(
+            f"Database schema is at version {current}, expected {LATEST_VERSION}. "
+            "Run `python -m app.migrations upgrade`."
+        )
+    upgrade(engine)
+
+
+def main(argv: List[str]) -> int:
+    from .db import engine
+
+    cmd = argv[0] if argv else "current"
+    if cmd == "current":
+        print(f"current={current_version(engine)} latest={LATEST_VERSION}")
+        return 0
+    if cmd == "upgrade":
+        target = int(argv[1]) if len(argv) > 1 else None
+        applied = upgrade(engine, target)
+        print(f"applied={applied or 'none'} current={current_version(engine)}")
+        return 0
+    print("usage: python -m app.migrations [current|upgrade [VERSION]]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
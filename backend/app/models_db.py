@@ -10,6 +10,9 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     Boolean,
+    Index,
+    false,
+    text,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .db import Base
@@ -55,6 +58,9 @@ class PTO(Base):
     should avoid assigning them as primary.
     """
     __tablename__ = "pto"
+    __table_args__ = (
+        Index("ix_pto_person_dates", "person_id", "start_date", "end_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     person_id: Mapped[int] = mapped_column(ForeignKey("people.id"), nullable=False)
@@ -66,6 +72,14 @@ class PTO(Base):
 
 class ScheduleDefinition(Base):
     __tablename__ = "schedule_definitions"
+    __table_args__ = (
+        Index(
+            "ix_schedule_definitions_team_year_created",
+            "team_id",
+            "year",
+            "created_at",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), nullable=False)
@@ -76,6 +90,10 @@ class ScheduleDefinition(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow
     )
+    # Bumped by every slot mutation; drives ETags and export caching.
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
 
     team = relationship("Team", back_populates="schedules")
     slots = relationship("OnCallSlot", back_populates="schedule", cascade="all, delete-orphan")
@@ -84,6 +102,22 @@ class OnCallSlot(Base):
     __tablename__ = "oncall_slots"
     __table_args__ = (
         UniqueConstraint("schedule_id", "slot", name="uix_schedule_slot"),
+        Index(
+            "ix_oncall_slots_schedule_start_end",
+            "schedule_id",
+            "start",
+            "end",
+            postgresql_include=["primary_person_id", "secondary_person_id"],
+        ),
+        Index("ix_oncall_slots_primary_person", "primary_person_id"),
+        Index("ix_oncall_slots_secondary_person", "secondary_person_id"),
+        # reminder dispatcher: upcoming slots not yet reminded
+        Index(
+            "ix_oncall_slots_unreminded_start",
+            "start",
+            postgresql_where=text("reminded = false"),
+            sqlite_where=text("reminded = false"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -99,5 +133,48 @@ class OnCallSlot(Base):
     )
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     reminded: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Set by manual edits (overrides, swaps, reassignments); PTO re-planning
+    # leaves these slots alone.
+    is_override: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
 
     schedule = relationship("ScheduleDefinition", back_populates="slots")
+
+
+class NotificationOutbox(Base):
+    """
+    Durable queue of outgoing notifications. Rows are written in the same
+    transaction as whatever caused them and delivered by app.outbox.
+    status: pending -> sent, or dead after the last failed attempt.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # worker poll: due pending messages
+        Index(
+            "ix_notification_outbox_pending_due",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)  # email | slack
+    recipient: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    subject: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="pending", server_default="pending"
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -1,33 +1,145 @@
+"""
+Delivery transports for the notification outbox (app.outbox).
 
+SlackTransport posts to the incoming webhook through one shared
+httpx.AsyncClient, so connections (and TLS sessions) are pooled across
+messages. SmtpTransport keeps up to SMTP_CONNECTIONS logged-in SMTP sessions
+open and reuses them for many messages; smtplib is blocking, so each send
+runs in a worker thread on a session it has to itself.
+
+Both raise on failure; retries and dead-lettering are the outbox's job.
+"""
+import asyncio
 import os
-import httpx
-from email.message import EmailMessage
+import queue
 import smtplib
+from email.message import EmailMessage
+from typing import Optional
+
+import httpx
 
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+SLACK_TIMEOUT_SECONDS = float(os.getenv("SLACK_TIMEOUT_SECONDS", "10"))
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
+# STARTTLS after connecting; turn off for a local relay / test stand-in.
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+# Open SMTP sessions kept for reuse (and so the most sent at once).
+SMTP_CONNECTIONS = int(os.getenv("SMTP_CONNECTIONS", "2"))
 FROM_EMAIL = os.getenv("FROM_EMAIL", "oncall-bot@example.com")
 
-async def send_slack_message(text: str):
-    if not SLACK_WEBHOOK_URL:
-        return
-    async with httpx.AsyncClient() as client:
-        await client.post(SLACK_WEBHOOK_URL, json={"text": text})
-
-def send_email(to_email: str, subject: str, body: str):
-    if not SMTP_HOST or not SMTP_USER or not SMTP_PASS:
-        return
-
-    msg = EmailMessage()
-    msg["From"] = FROM_EMAIL
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASS)
-        server.send_message(msg)
+
+def slack_configured() -> bool:
+    return bool(SLACK_WEBHOOK_URL)
+
+
+def email_configured() -> bool:
+    return bool(SMTP_HOST)
+
+
+class SlackTransport:
+    def __init__(
+        self,
+        webhook_url: Optional[str] = None,
+        timeout: float = SLACK_TIMEOUT_SECONDS,
+        max_connections: int = 10,
+    ):
+        self.webhook_url = webhook_url or SLACK_WEBHOOK_URL
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def send(self, text: str) -> None:
+        if not self.webhook_url:
+            raise RuntimeError("SLACK_WEBHOOK_URL is not set")
+        response = await self._client.post(self.webhook_url, json={"text": text})
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class SmtpTransport:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: int = SMTP_PORT,
+        user: Optional[str] = SMTP_USER,
+        password: Optional[str] = SMTP_PASS,
+        starttls: bool = SMTP_STARTTLS,
+        from_email: str = FROM_EMAIL,
+        connections: int = SMTP_CONNECTIONS,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host or SMTP_HOST
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.from_email = from_email
+        self.timeout = timeout
+        self.connections = connections
+        # idle sessions (None = slot with no open connection yet)
+        self._sessions: "queue.Queue[Optional[smtplib.SMTP]]" = queue.Queue()
+        for _ in range(connections):
+            self._sessions.put(None)
+        self._slots = asyncio.Semaphore(connections)
+
+    def _connect(self) -> smtplib.SMTP:
+        if not self.host:
+            raise RuntimeError("SMTP_HOST is not set")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _send_blocking(self, msg: EmailMessage) -> None:
+        server = self._sessions.get_nowait()  # a slot is free: we hold the semaphore
+        try:
+            if server is not None:
+                try:
+                    server.send_message(msg)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    server = None  # idle session timed out server-side; reconnect once
+            server = self._connect()
+            server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            if server is not None:
+                server.close()
+            server = None
+            raise
+        finally:
+            self._sessions.put(server)
+
+    async def send(self, to_email: str, subject: str, body: str) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.from_email
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.set_content(body)
+        async with self._slots:
+            await asyncio.to_thread(self._send_blocking, msg)
+
+    def close(self) -> None:
+        for _ in range(self.connections):
+            server = self._sessions.get()
+            if server is not None:
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    server.close()
+            self._sessions.put(None)
@@ -0,0 +1,178 @@
+"""
+Process-local resolver for "who is on call now".
+
+Keeps, per schedule, the slot intervals and the people they reference so the
+on-call-now endpoints can answer from memory. Entries are loaded on first use
+and dropped by the repository write paths (override, bulk reassign, remove
+person, schedule/team deletion, new generations). Each worker process has its
+own copy, so entries also expire after ONCALL_CACHE_TTL_SECONDS to pick up
+writes made through other workers. A TTL of 0 disables the cache. At most
+ONCALL_CACHE_MAX_SCHEDULES snapshots are kept, least recently used first out.
+
+Readers take generation() before loading from the database and pass it to
+put(): a snapshot whose schedule or team was invalidated in between may
+have been read before the write committed, so it is dropped instead of
+being served until the TTL runs out.
+"""
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from .schemas import OnCallSlotRead, PersonRead
+
+ONCALL_CACHE_TTL_SECONDS = float(os.getenv("ONCALL_CACHE_TTL_SECONDS", "60"))
+ONCALL_CACHE_MAX_SCHEDULES = int(os.getenv("ONCALL_CACHE_MAX_SCHEDULES", "1024"))
+
+
+class ScheduleSnapshot:
+    """Immutable view of one schedule's slots plus the people they use."""
+
+    def __init__(
+        self,
+        schedule_id: int,
+        team_id: int,
+        year: int,
+        slots: List[OnCallSlotRead],
+        people: Dict[int, PersonRead],
+    ):
+        self.schedule_id = schedule_id
+        self.team_id = team_id
+        self.year = year
+        self.slots = sorted(slots, key=lambda s: (s.start, s.slot))
+        self.people = people
+        self._starts = [s.start for s in self.slots]
+        self.loaded_at = time.monotonic()
+
+    def slot_for(self, day: date) -> Optional[OnCallSlotRead]:
+        idx = bisect_right(self._starts, day)
+        if idx == 0:
+            return None
+        slot = self.slots[idx - 1]
+        return slot if slot.end >= day else None
+
+    def resolve(
+        self, day: date
+    ) -> Optional[Tuple[OnCallSlotRead, Optional[PersonRead], Optional[PersonRead]]]:
+        slot = self.slot_for(day)
+        if slot is None:
+            return None
+        primary = self.people.get(slot.primary_person_id)
+        secondary = (
+            self.people.get(slot.secondary_person_id)
+            if slot.secondary_person_id is not None
+            else None
+        )
+        return slot, primary, secondary
+
+
+class OnCallResolver:
+    def __init__(
+        self,
+        ttl_seconds: float = ONCALL_CACHE_TTL_SECONDS,
+        max_schedules: int = ONCALL_CACHE_MAX_SCHEDULES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_schedules = max_schedules
+        self._lock = threading.Lock()
+        self._schedules: "OrderedDict[int, ScheduleSnapshot]" = OrderedDict()
+        # (team_id, year) -> schedule_id of the team's current schedule
+        self._team_current: Dict[Tuple[int, int], int] = {}
+        # bumped by every invalidation; the maps record the generation at
+        # which each schedule / team was last invalidated
+        self._generation = 0
+        self._schedule_invalidated: Dict[int, int] = {}
+        self._team_invalidated: Dict[int, int] = {}
+        self._cleared_at = -1
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _fresh(self, snap: ScheduleSnapshot) -> bool:
+        return time.monotonic() - snap.loaded_at < self.ttl_seconds
+
+    def _drop(self, schedule_id: int) -> None:
+        snap = self._schedules.pop(schedule_id, None)
+        if snap is not None:
+            key = (snap.team_id, snap.year)
+            if self._team_current.get(key) == schedule_id:
+                del self._team_current[key]
+
+    def generation(self) -> int:
+        """Token to take before loading a snapshot and hand to put()."""
+        with self._lock:
+            return self._generation
+
+    def get_schedule(self, schedule_id: int) -> Optional[ScheduleSnapshot]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            snap = self._schedules.get(schedule_id)
+            if snap is None:
+                return None
+            if not self._fresh(snap):
+                self._drop(schedule_id)
+                return None
+            self._schedules.move_to_end(schedule_id)
+            return snap
+
+    def get_team_schedule(self, team_id: int, year: int) -> Optional[ScheduleSnapshot]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            schedule_id = self._team_current.get((team_id, year))
+        if schedule_id is None:
+            return None
+        return self.get_schedule(schedule_id)
+
+    def put(
+        self, snap: ScheduleSnapshot, generation: int, current_for_team: bool = False
+    ) -> bool:
+        """Cache snap unless its schedule or team was invalidated after
+        `generation` was taken. Returns whether it was stored."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if (
+                self._cleared_at >= generation
+                or self._schedule_invalidated.get(snap.schedule_id, -1) >= generation
+                or self._team_invalidated.get(snap.team_id, -1) >= generation
+            ):
+                return False
+            self._schedules[snap.schedule_id] = snap
+            self._schedules.move_to_end(snap.schedule_id)
+            if current_for_team:
+                self._team_current[(snap.team_id, snap.year)] = snap.schedule_id
+            while len(self._schedules) > self.max_schedules:
+                self._drop(next(iter(self._schedules)))
+            return True
+
+    def invalidate_schedule(self, schedule_id: int) -> None:
+        with self._lock:
+            self._schedule_invalidated[schedule_id] = self._generation
+            self._generation += 1
+            self._drop(schedule_id)
+
+    def invalidate_team(self, team_id: int) -> None:
+        """Drop the team's current-schedule pointers and all its snapshots."""
+        with self._lock:
+            self._team_invalidated[team_id] = self._generation
+            self._generation += 1
+            for key in [k for k in self._team_current if k[0] == team_id]:
+                del self._team_current[key]
+            for sid in [sid for sid, s in self._schedules.items() if s.team_id == team_id]:
+                self._drop(sid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cleared_at = self._generation
+            self._generation += 1
+            self._schedules.clear()
+            self._team_current.clear()
+
+
+oncall_resolver = OnCallResolver()
@@ -0,0 +1,192 @@
+"""
+Durable notification outbox and its delivery worker.
+
+Producers never talk to Slack or SMTP. They add rows to notification_outbox
+(OutboxRepositoryDB.enqueue) in their own transaction, e.g.
+
+    OutboxRepositoryDB(db).enqueue([email_message(to, subject, body)])
+    db.commit()
+
+and OutboxWorker, started with the app, drains it: it claims due messages
+in batches (FOR UPDATE SKIP LOCKED, so every API worker can run one),
+delivers them through one shared Slack HTTP client and a small pool of
+reused SMTP sessions with at most OUTBOX_CONCURRENCY deliveries in flight,
+and records the outcome in bulk. A failed message is retried with
+exponential backoff and jitter; after OUTBOX_MAX_ATTEMPTS it is marked dead
+and kept for inspection (GET /outbox) and requeueing.
+
+Delivery is at least once: a worker that dies between sending and
+recording leaves the batch to be retried when its claim lease expires.
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .notifications import SlackTransport, SmtpTransport, email_configured, slack_configured
+from .repositories_db import OutboxRepositoryDB
+
+OUTBOX_WORKER_ENABLED = os.getenv("OUTBOX_WORKER_ENABLED", "1") == "1"
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# How long a claimed batch is reserved before another worker may retry it;
+# must comfortably exceed the time to deliver one batch.
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+
+def email_message(to_email: Optional[str], subject: str, body: str) -> Optional[Dict[str, Any]]:
+    """Outbox row for an email, or None when email is not configured or
+    there is no address (as the old direct sender silently skipped)."""
+    if not to_email or not email_configured():
+        return None
+    return {"channel": "email", "recipient": to_email, "subject": subject, "body": body}
+
+
+def slack_message(text: str) -> Optional[Dict[str, Any]]:
+    """Outbox row for the Slack webhook, or None when it is not configured."""
+    if not slack_configured():
+        return None
+    return {"channel": "slack", "body": text}
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next try after `attempts` failures: exponential,
+    capped, with jitter so a burst of failures does not retry in lockstep."""
+    delay = min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        slack: Optional[SlackTransport] = None,
+        smtp: Optional[SmtpTransport] = None,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        lease_seconds: float = OUTBOX_LEASE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self._slack = slack
+        self._smtp = smtp
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    # transports are created on first use, inside the running event loop
+    @property
+    def slack(self) -> SlackTransport:
+        if self._slack is None:
+            self._slack = SlackTransport()
+        return self._slack
+
+    @property
+    def smtp(self) -> SmtpTransport:
+        if self._smtp is None:
+            self._smtp = SmtpTransport()
+        return self._smtp
+
+    async def _deliver(self, msg) -> None:
+        if msg.channel == "email":
+            await self.smtp.send(msg.recipient, msg.subject or "", msg.body)
+        elif msg.channel == "slack":
+            await self.slack.send(msg.body)
+        else:
+            raise ValueError(f"Unknown outbox channel: {msg.channel}")
+
+    def _claim(self, now: datetime):
+        db = self.session_factory()
+        try:
+            return OutboxRepositoryDB(db).claim_due(now, self.batch_size, self.lease_seconds)
+        finally:
+            db.close()
+
+    def _record(self, sent: List[int], failures: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            OutboxRepositoryDB(db).record_results(sent, failures, datetime.utcnow())
+        finally:
+            db.close()
+
+    async def drain_once(self) -> int:
+        """Claim, deliver and record one batch. Returns the batch size."""
+        messages = await asyncio.to_thread(self._claim, datetime.utcnow())
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sent: List[int] = []
+        failures: List[Dict[str, Any]] = []
+
+        async def deliver_one(msg) -> None:
+            async with semaphore:
+                try:
+                    await self._deliver(msg)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"[:1000]
+                    dead = msg.attempts >= self.max_attempts
+                    if dead:
+                        print(f"❌ Outbox message {msg.id} dead after {msg.attempts} attempts: {error}")
+                    failures.append(
+                        {
+                            "id": msg.id,
+                            "status": "dead" if dead else "pending",
+                            "next_attempt_at": datetime.utcnow()
+                            + timedelta(seconds=retry_delay(msg.attempts)),
+                            "error": error,
+                        }
+                    )
+                else:
+                    sent.append(msg.id)
+
+        await asyncio.gather(*(deliver_one(msg) for msg in messages))
+        await asyncio.to_thread(self._record, sent, failures)
+        return len(messages)
+
+    async def run(self) -> None:
+        """Drain until cancelled: full batches back to back, then poll."""
+        while True:
+            try:
+                while await self.drain_once() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Outbox drain failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+            print(f"📬 Outbox worker started (poll every {self.poll_seconds:g}s).")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._slack is not None:
+            await self._slack.aclose()
+            self._slack = None
+        if self._smtp is not None:
+            await asyncio.to_thread(self._smtp.close)
+            self._smtp = None
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,33 @@
+"""
+Helpers for keyset-paginated, field-projected list endpoints.
+
+Lists are ordered by id; a page is `?after_id=<last id seen>&limit=N`. When
+a page is full, the id to continue from is returned in the X-Next-Cursor
+header, so the response body keeps its plain-list shape.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Parse ?fields=a,b into a validated list (None means all fields)."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return requested
+
+
+def set_next_cursor(
+    response: Response, rows: List[Dict[str, Any]], limit: Optional[int], last_id: Optional[int]
+) -> None:
+    if limit is not None and len(rows) == limit and last_id is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(last_id)
@@ -0,0 +1,137 @@
+"""
+Per-endpoint query budgets and an N+1 detector for development and tests.
+
+Endpoints declare how many SQL statements a request may issue:
+
+    @router.get("/{team_id}")
+    @query_budget(2)
+    def get_team(...): ...
+
+With QUERY_DEBUG=1 the QueryBudgetMiddleware counts every statement of a
+request (through the same engine events as app.metrics) and:
+
+- replaces the response with a 500 describing the overrun when a budgeted
+  endpoint exceeds its budget before the response starts (streamed bodies
+  that overrun later are logged, since the status has already been sent);
+- logs statement shapes repeated QUERY_N_PLUS_ONE_THRESHOLD or more times
+  in one request as likely N+1s;
+- adds an X-Query-Count header to every response.
+
+With QUERY_DEBUG unset the middleware is not installed and budgets are
+inert attributes.
+"""
+import json
+import os
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from .metrics import RequestStats, current_request
+
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "0") == "1"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "3"))
+
+F = TypeVar("F", bound=Callable)
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Declare the maximum SQL statements one request to this endpoint may issue."""
+
+    def decorator(fn: F) -> F:
+        fn.__query_budget__ = max_queries
+        return fn
+
+    return decorator
+
+
+def repeated_shapes(stats: RequestStats, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+    """Statement shapes run at least threshold times, most frequent first."""
+    return sorted(
+        ((shape, n) for shape, n in (stats.shapes or {}).items() if n >= threshold),
+        key=lambda item: -item[1],
+    )
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # share the metrics middleware's stats when it is installed
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        stats.shapes = {}
+        replaced = False
+        started = False
+
+        def budget() -> Optional[int]:
+            return getattr(scope.get("endpoint"), "__query_budget__", None)
+
+        async def send_wrapper(message):
+            nonlocal replaced, started
+            if replaced:
+                return  # original response swallowed, ours already sent
+            if message["type"] == "http.response.start":
+                started = True
+                limit = budget()
+                if limit is not None and stats.queries > limit:
+                    replaced = True
+                    await self._send_overrun(send, scope, stats, limit)
+                    return
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(stats.queries).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._report(scope, stats, budget(), started and not replaced)
+            if token is not None:
+                current_request.reset(token)
+
+    async def _send_overrun(self, send, scope, stats: RequestStats, limit: int) -> None:
+        body = json.dumps(
+            {
+                "detail": (
+                    f"Query budget exceeded on {_route_label(scope)}: "
+                    f"{stats.queries} statements, budget {limit}"
+                ),
+                "repeated_statements": [
+                    {"count": n, "statement": shape}
+                    for shape, n in repeated_shapes(stats, self.threshold)
+                ],
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-query-count", str(stats.queries).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _report(self, scope, stats: RequestStats, limit: Optional[int], sent: bool) -> None:
+        label = _route_label(scope)
+        for shape, n in repeated_shapes(stats, self.threshold):
+            print(f"⚠️  Possible N+1 on {label}: {n}x {shape[:200]}")
+        if sent and limit is not None and stats.queries > limit:
+            # overran while streaming, after the status was sent
+            print(f"❌ Query budget exceeded on {label}: {stats.queries} statements, budget {limit}")
@@ -0,0 +1,128 @@
+"""
+Background dispatcher for on-call reminders.
+
+Every REMINDER_INTERVAL_SECONDS the dispatcher claims current-schedule slots
+starting within the next REMINDER_LEAD_DAYS days whose `reminded` flag is
+still false (SchedulesRepositoryDB.claim_due_reminders, served by a partial
+index), queues an email to the primary and secondary plus one Slack message
+per slot in the notification outbox, and flags the slots in one bulk UPDATE.
+The outbox rows and the flags commit together, so a slot is queued exactly
+once; delivery, retries and concurrency limits are app.outbox's job.
+
+Claimed rows stay locked (FOR UPDATE SKIP LOCKED) until that commit, so
+every API worker can run a dispatcher without two of them reminding the
+same slot.
+
+Enabled with REMINDERS_ENABLED=1; started and stopped with the app.
+"""
+import asyncio
+import os
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .outbox import email_message, slack_message
+from .repositories_db import OutboxRepositoryDB, SchedulesRepositoryDB
+
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "0") == "1"
+REMINDER_INTERVAL_SECONDS = float(os.getenv("REMINDER_INTERVAL_SECONDS", "60"))
+# Remind about slots starting today through today + REMINDER_LEAD_DAYS.
+REMINDER_LEAD_DAYS = int(os.getenv("REMINDER_LEAD_DAYS", "1"))
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "100"))
+
+
+def _reminder_text(row, role: str) -> str:
+    return (
+        f"On-call reminder: you are {role} for {row.team_name} "
+        f"from {row.start.isoformat()} to {row.end.isoformat()} (slot {row.slot})."
+    )
+
+
+def _slack_text(row) -> str:
+    text = (
+        f"📟 {row.team_name} on-call {row.start.isoformat()} – {row.end.isoformat()}: "
+        f"primary {row.primary_name}"
+    )
+    if row.secondary_name:
+        text += f", secondary {row.secondary_name}"
+    return text
+
+
+class ReminderDispatcher:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval_seconds: float = REMINDER_INTERVAL_SECONDS,
+        lead_days: int = REMINDER_LEAD_DAYS,
+        batch_size: int = REMINDER_BATCH_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.lead_days = lead_days
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def _dispatch_batch(self, today: date) -> int:
+        db = self.session_factory()
+        try:
+            repo = SchedulesRepositoryDB(db)
+            rows = repo.claim_due_reminders(
+                today, today + timedelta(days=self.lead_days), self.batch_size
+            )
+            if not rows:
+                db.rollback()
+                return 0
+            messages = []
+            for row in rows:
+                subject = f"On-call reminder: {row.team_name}, {row.start.isoformat()}"
+                messages.append(
+                    email_message(row.primary_email, subject, _reminder_text(row, "primary"))
+                )
+                messages.append(
+                    email_message(row.secondary_email, subject, _reminder_text(row, "secondary"))
+                )
+                messages.append(slack_message(_slack_text(row)))
+            try:
+                OutboxRepositoryDB(db).enqueue([m for m in messages if m is not None])
+            except Exception:
+                db.rollback()
+                raise
+            return repo.mark_reminded([row.id for row in rows])  # commits both
+        finally:
+            db.close()
+
+    async def dispatch_once(self, today: Optional[date] = None) -> int:
+        """Claim, queue and flag one batch. Returns the number of slots flagged."""
+        return await asyncio.to_thread(self._dispatch_batch, today or date.today())
+
+    async def run(self) -> None:
+        """Dispatch until cancelled: full batches back to back, then sleep."""
+        while True:
+            try:
+                while await self.dispatch_once() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Reminder dispatch failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+            print(f"⏰ Reminder dispatcher started (every {self.interval_seconds:g}s).")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+reminder_dispatcher = ReminderDispatcher()
@@ -0,0 +1,123 @@
+"""
+asyncio counterparts of the read paths in repositories_db.py, used by the
+hot GET endpoints. They share statement builders with the sync repositories
+and the same process-local on-call resolver, so both stacks return identical
+results and see the same invalidations.
+"""
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models_db import OnCallSlot, Person, ScheduleDefinition, Team
+from .oncall_cache import ScheduleSnapshot, oncall_resolver
+from .repositories_db import (
+    build_snapshot,
+    current_schedule_stmt,
+    first_row_per_team,
+    latest_schedule_stmt,
+    oncall_now_for_teams_stmt,
+    referenced_person_ids,
+    slots_stmt,
+)
+
+
+# ----- People -----
+class PeopleRepositoryAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, person_id: int) -> Optional[Person]:
+        return await self.db.get(Person, person_id)
+
+
+# ----- Teams -----
+class TeamsRepositoryAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, team_id: int) -> Optional[Team]:
+        return await self.db.get(Team, team_id)
+
+
+# ----- Schedules -----
+class SchedulesRepositoryAsync:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_schedule(self, schedule_id: int) -> Optional[ScheduleDefinition]:
+        return await self.db.get(ScheduleDefinition, schedule_id)
+
+    async def get_schedule_for_team_year(
+        self, team_id: int, year: int
+    ) -> Optional[ScheduleDefinition]:
+        return (await self.db.scalars(latest_schedule_stmt(team_id, year))).first()
+
+    async def get_slots(
+        self,
+        schedule_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        slot_from: Optional[int] = None,
+        slot_to: Optional[int] = None,
+    ) -> List[OnCallSlot]:
+        """See SchedulesRepositoryDB.get_slots."""
+        stmt = slots_stmt(schedule_id, start, end, slot_from, slot_to)
+        return list((await self.db.scalars(stmt)).all())
+
+    async def _load_snapshot(self, sched: ScheduleDefinition) -> ScheduleSnapshot:
+        slots = (await self.db.scalars(slots_stmt(sched.id))).all()
+        person_ids = referenced_person_ids(slots)
+        people = (
+            (await self.db.scalars(select(Person).where(Person.id.in_(person_ids)))).all()
+            if person_ids
+            else []
+        )
+        return build_snapshot(sched, slots, people)
+
+    async def get_oncall_now_for_schedule(self, schedule_id: int):
+        """See SchedulesRepositoryDB.get_oncall_now_for_schedule."""
+        snap = oncall_resolver.get_schedule(schedule_id)
+        if snap is None:
+            generation = oncall_resolver.generation()
+            sched = await self.db.get(ScheduleDefinition, schedule_id)
+            if not sched:
+                return None
+            snap = await self._load_snapshot(sched)
+            oncall_resolver.put(snap, generation)
+
+        resolved = snap.resolve(date.today())
+        if not resolved:
+            return None
+        return (snap, *resolved)
+
+    async def get_oncall_now_for_team(self, team_id: int, year: int | None = None):
+        """See SchedulesRepositoryDB.get_oncall_now_for_team."""
+        today = date.today()
+        if year is None:
+            year = today.year
+
+        snap = oncall_resolver.get_team_schedule(team_id, year)
+        if snap is None:
+            generation = oncall_resolver.generation()
+            sched = (await self.db.scalars(current_schedule_stmt(team_id, year))).first()
+            if not sched:
+                return None
+            snap = await self._load_snapshot(sched)
+            oncall_resolver.put(snap, generation, current_for_team=True)
+
+        resolved = snap.resolve(today)
+        if not resolved:
+            return None
+        return (snap, *resolved)
+
+    async def get_oncall_now_for_teams(
+        self, team_ids: Optional[List[int]] = None, year: int | None = None
+    ) -> List[Tuple[int, int, OnCallSlot, Person, Optional[Person]]]:
+        """See SchedulesRepositoryDB.get_oncall_now_for_teams."""
+        today = date.today()
+        if year is None:
+            year = today.year
+        rows = (await self.db.execute(oncall_now_for_teams_stmt(team_ids, year, today))).all()
+        return first_row_per_team(rows)
@@ -1,9 +1,19 @@
-from typing import List, Optional, Dict, Set
-from datetime import date, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete,or_
-from sqlalchemy.exc import IntegrityError
-from .models_db import Person, Team, TeamMembership, PTO, ScheduleDefinition, OnCallSlot
+import os
+from io import StringIO
+from typing import Any, Iterator, List, Optional, Dict, Sequence, Set, Tuple
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Row, and_, bindparam, case, false, select, delete, insert, update, func, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from .models_db import (
+    Person,
+    Team,
+    TeamMembership,
+    PTO,
+    ScheduleDefinition,
+    OnCallSlot,
+    NotificationOutbox,
+)
 
 from .schemas import (
     PersonCreate,
@@ -12,11 +22,29 @@ from .schemas import (
     TeamRead,
     PTOCreate,
     PTORead,
+    PTOReplanChange,
+    OnCallSlotRead,
+    OverrideRequest,
+)
+from .export_cache import export_cache
+from .oncall_cache import ScheduleSnapshot, oncall_resolver
+from .scheduler import (
+    PTOByPerson,
+    PTOInterval,
+    generate_slots,
+    merge_pto_intervals,
+    overlaps_pto,
 )
-from .scheduler import generate_oncall_slots
 
 from app.schemas import BulkReassignRequest
 
+PERSON_FIELDS = ("id", "name", "email", "time_zone")
+TEAM_FIELDS = ("id", "name", "description", "member_ids")
+
+
+class SlotConflictError(ValueError):
+    """A slot edit would leave the same person as primary and secondary."""
+
 # ----- People -----
 class PeopleRepositoryDB:
     def __init__(self, db: Session):
@@ -29,9 +57,43 @@ class PeopleRepositoryDB:
         self.db.refresh(obj)
         return PersonRead.model_validate(obj)
 
-    def list(self) -> List[PersonRead]:
-        objs = self.db.scalars(select(Person)).all()
-        return [PersonRead.model_validate(o) for o in objs]
+    def list(
+        self,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        q: Optional[str] = None,
+        team_id: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Keyset-paginated people, ordered by id, as dicts of `fields` plus id
+        (default: every PersonRead field). Only those columns are selected.
+
+        - after_id: return people with id > after_id
+        - q: case-insensitive substring match on name or email
+        - team_id: only members of that team
+        """
+        fields = list(fields or PERSON_FIELDS)
+        columns = [getattr(Person, f) for f in fields]
+        if "id" not in fields:
+            columns.append(Person.id)
+
+        stmt = select(*columns).order_by(Person.id)
+        if after_id is not None:
+            stmt = stmt.where(Person.id > after_id)
+        if q:
+            pattern = f"%{q}%"
+            stmt = stmt.where(or_(Person.name.ilike(pattern), Person.email.ilike(pattern)))
+        if team_id is not None:
+            stmt = stmt.where(
+                Person.id.in_(
+                    select(TeamMembership.person_id).where(TeamMembership.team_id == team_id)
+                )
+            )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return [{f: row._mapping[f] for f in fields} | {"id": row.id} for row in self.db.execute(stmt)]
 
     def get(self, person_id: int) -> Optional[Person]:
         return self.db.get(Person, person_id)
@@ -114,24 +176,83 @@ class TeamsRepositoryDB:
             member_ids=[],
         )
 
-    def list(self) -> List[TeamRead]:
-        teams = self.db.scalars(select(Team)).all()
-        result: List[TeamRead] = []
-        for t in teams:
-            member_ids = [m.person_id for m in t.memberships]
-            result.append(
-                TeamRead(
-                    id=t.id,
-                    name=t.name,
-                    description=t.description,
-                    member_ids=member_ids,
+    def list(
+        self,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        q: Optional[str] = None,
+        member_id: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Keyset-paginated teams, ordered by id, as dicts of `fields` plus id
+        (default: every TeamRead field).
+
+        member_ids for the whole page come from one extra query, so the
+        query count is constant instead of one lazy load per team.
+
+        - after_id: return teams with id > after_id
+        - q: case-insensitive substring match on name or description
+        - member_id: only teams that person belongs to
+        """
+        fields = list(fields or TEAM_FIELDS)
+        columns = [getattr(Team, f) for f in fields if f != "member_ids"]
+        if "id" not in fields:
+            columns.append(Team.id)
+
+        stmt = select(*columns).order_by(Team.id)
+        if after_id is not None:
+            stmt = stmt.where(Team.id > after_id)
+        if q:
+            pattern = f"%{q}%"
+            stmt = stmt.where(or_(Team.name.ilike(pattern), Team.description.ilike(pattern)))
+        if member_id is not None:
+            stmt = stmt.where(
+                Team.id.in_(
+                    select(TeamMembership.team_id).where(TeamMembership.person_id == member_id)
                 )
             )
-        return result
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        rows = self.db.execute(stmt).all()
+        teams = [
+            {f: row._mapping[f] for f in fields if f != "member_ids"} | {"id": row.id}
+            for row in rows
+        ]
+        if "member_ids" in fields and teams:
+            members: Dict[int, List[int]] = {t["id"]: [] for t in teams}
+            pairs = self.db.execute(
+                select(TeamMembership.team_id, TeamMembership.person_id)
+                .where(TeamMembership.team_id.in_(members))
+                .order_by(TeamMembership.team_id, TeamMembership.id)
+            ).all()
+            for tid, pid in pairs:
+                members[tid].append(pid)
+            for t in teams:
+                t["member_ids"] = members[t["id"]]
+        return teams
 
     def get(self, team_id: int) -> Optional[Team]:
         return self.db.get(Team, team_id)
 
+    def member_ids_for_teams(self, team_ids: List[int]) -> Dict[int, List[int]]:
+        """
+        Return {team_id: [person_id, ...]} for every existing team in team_ids
+        (teams with no members map to an empty list) using two queries.
+        """
+        result: Dict[int, List[int]] = {
+            tid: [] for tid in self.db.scalars(select(Team.id).where(Team.id.in_(team_ids)))
+        }
+        rows = self.db.execute(
+            select(TeamMembership.team_id, TeamMembership.person_id)
+            .where(TeamMembership.team_id.in_(team_ids))
+            .order_by(TeamMembership.team_id, TeamMembership.id)
+        ).all()
+        for team_id, person_id in rows:
+            result[team_id].append(person_id)
+        return result
+
     def update_members(self, team_id: int, member_ids: List[int]) -> TeamRead:
         team = self.db.get(Team, team_id)
         if not team:
@@ -140,8 +261,11 @@ class TeamsRepositoryDB:
         self.db.execute(
             delete(TeamMembership).where(TeamMembership.team_id == team_id)
         )
-        for pid in member_ids:
-            self.db.add(TeamMembership(team_id=team_id, person_id=pid))
+        if member_ids:
+            self.db.execute(
+                insert(TeamMembership),
+                [{"team_id": team_id, "person_id": pid} for pid in member_ids],
+            )
         self.db.commit()
         self.db.refresh(team)
         return TeamRead(
@@ -163,17 +287,17 @@ class TeamsRepositoryDB:
             return False
 
         # 1) Find all schedules belonging to this team
-        schedules = (
-            self.db.query(ScheduleDefinition)
-            .filter(ScheduleDefinition.team_id == team_id)
-            .all()
+        schedule_ids = list(
+            self.db.scalars(
+                select(ScheduleDefinition.id).where(ScheduleDefinition.team_id == team_id)
+            )
         )
 
-        # 2) Delete slots for those schedules
-        for sched in schedules:
+        # 2) Delete slots for those schedules, one statement for all of them
+        if schedule_ids:
             (
                 self.db.query(OnCallSlot)
-                .filter(OnCallSlot.schedule_id == sched.id)
+                .filter(OnCallSlot.schedule_id.in_(schedule_ids))
                 .delete(synchronize_session=False)
             )
 
@@ -195,6 +319,9 @@ class TeamsRepositoryDB:
         self.db.delete(team)
 
         self.db.commit()
+        oncall_resolver.invalidate_team(team_id)
+        for schedule_id in schedule_ids:
+            export_cache.invalidate_schedule(schedule_id)
         return True
 
 # ----- PTO -----
@@ -214,32 +341,274 @@ class PTORepositoryDB:
         self.db.refresh(obj)
         return PTORead.model_validate(obj)
 
-    def list_for_team_year(self, team_id: int, year: int) -> Dict[int, Set]:
+    def get(self, pto_id: int) -> Optional[PTORead]:
+        obj = self.db.get(PTO, pto_id)
+        return PTORead.model_validate(obj) if obj else None
+
+    def list_for_team_year(self, team_id: int, year: int) -> PTOByPerson:
         """
-        Return {person_id: {dates...}} for PTO within that year.
+        Return {person_id: [(start, end), ...]} for PTO within that year,
+        clipped to the year and merged into sorted, disjoint intervals.
         """
-        ptos = (
-            self.db.query(PTO)
-            .join(Person)
-            .join(TeamMembership, TeamMembership.person_id == Person.id)
-            .filter(
-                TeamMembership.team_id == team_id,
-                PTO.start_date <= date(year, 12, 31),
-                PTO.end_date >= date(year, 1, 1),
+        return self.list_for_teams_years([(team_id, year)]).get((team_id, year), {})
+
+    def list_for_teams_years(
+        self, pairs: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], PTOByPerson]:
+        """
+        Batched list_for_team_year: one query covering every (team_id, year)
+        pair. Returns {(team_id, year): {person_id: intervals}}; pairs with no
+        PTO are omitted.
+        """
+        if not pairs:
+            return {}
+        team_ids = {t for t, _ in pairs}
+        years_by_team: Dict[int, Set[int]] = {}
+        for t, y in pairs:
+            years_by_team.setdefault(t, set()).add(y)
+
+        rows = self.db.execute(
+            select(TeamMembership.team_id, PTO.person_id, PTO.start_date, PTO.end_date)
+            .join(TeamMembership, TeamMembership.person_id == PTO.person_id)
+            .where(
+                TeamMembership.team_id.in_(team_ids),
+                PTO.start_date <= date(max(y for _, y in pairs), 12, 31),
+                PTO.end_date >= date(min(y for _, y in pairs), 1, 1),
             )
-            .all()
+        ).all()
+
+        raw: Dict[Tuple[int, int], Dict[int, List[PTOInterval]]] = {}
+        for team_id, person_id, start, end in rows:
+            for year in years_by_team[team_id]:
+                year_start = date(year, 1, 1)
+                year_end = date(year, 12, 31)
+                if start > year_end or end < year_start:
+                    continue
+                raw.setdefault((team_id, year), {}).setdefault(person_id, []).append(
+                    (max(start, year_start), min(end, year_end))
+                )
+        return {
+            key: {pid: merge_pto_intervals(ivs) for pid, ivs in by_person.items()}
+            for key, by_person in raw.items()
+        }
+
+# ----- Schedules -----
+
+# Statement builders / row helpers shared with repositories_async.py, so the
+# sync and async repositories issue exactly the same SQL.
+
+def slots_stmt(
+    schedule_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    slot_from: Optional[int] = None,
+    slot_to: Optional[int] = None,
+):
+    """
+    Slots of a schedule ordered by slot number, optionally restricted to
+    those overlapping [start, end] and/or numbered slot_from..slot_to
+    (all bounds inclusive). Served by ix_oncall_slots_schedule_start_end /
+    uix_schedule_slot.
+    """
+    stmt = select(OnCallSlot).where(OnCallSlot.schedule_id == schedule_id)
+    if start is not None:
+        stmt = stmt.where(OnCallSlot.end >= start)
+    if end is not None:
+        stmt = stmt.where(OnCallSlot.start <= end)
+    if slot_from is not None:
+        stmt = stmt.where(OnCallSlot.slot >= slot_from)
+    if slot_to is not None:
+        stmt = stmt.where(OnCallSlot.slot <= slot_to)
+    return stmt.order_by(OnCallSlot.slot)
+
+
+def current_schedule_stmt(team_id: int, year: int):
+    """The schedule on-call-now uses for a team/year: newest by created_at."""
+    return (
+        select(ScheduleDefinition)
+        .where(
+            ScheduleDefinition.team_id == team_id,
+            ScheduleDefinition.year == year,
+        )
+        .order_by(ScheduleDefinition.created_at.desc())
+        .limit(1)
+    )
+
+
+def latest_schedule_stmt(team_id: int, year: int):
+    """The schedule the team/year read endpoints return: highest id."""
+    return (
+        select(ScheduleDefinition)
+        .where(
+            ScheduleDefinition.team_id == team_id,
+            ScheduleDefinition.year == year,
+        )
+        .order_by(ScheduleDefinition.id.desc())
+        .limit(1)
+    )
+
+
+def oncall_now_for_teams_stmt(team_ids: Optional[List[int]], year: int, today: date):
+    """
+    Latest schedule per team picked with a window function, joined to the
+    slot covering today and both people. Rows are
+    (schedule_id, team_id, OnCallSlot, primary Person, secondary Person|None).
+    """
+    ranked = select(
+        ScheduleDefinition.id.label("schedule_id"),
+        ScheduleDefinition.team_id.label("team_id"),
+        func.row_number()
+        .over(
+            partition_by=ScheduleDefinition.team_id,
+            order_by=(
+                ScheduleDefinition.created_at.desc(),
+                ScheduleDefinition.id.desc(),
+            ),
+        )
+        .label("rn"),
+    ).where(ScheduleDefinition.year == year)
+    if team_ids:
+        ranked = ranked.where(ScheduleDefinition.team_id.in_(team_ids))
+    ranked = ranked.subquery()
+
+    primary = aliased(Person)
+    secondary = aliased(Person)
+    return (
+        select(ranked.c.schedule_id, ranked.c.team_id, OnCallSlot, primary, secondary)
+        .select_from(ranked)
+        .join(OnCallSlot, OnCallSlot.schedule_id == ranked.c.schedule_id)
+        .join(primary, primary.id == OnCallSlot.primary_person_id)
+        .outerjoin(secondary, secondary.id == OnCallSlot.secondary_person_id)
+        .where(
+            ranked.c.rn == 1,
+            OnCallSlot.start <= today,
+            OnCallSlot.end >= today,
+        )
+        .order_by(ranked.c.team_id, OnCallSlot.slot)
+    )
+
+
+def current_schedules_subquery(*criteria):
+    """
+    Schedules ranked newest first (by created_at, as on-call-now picks them)
+    within each team/year, restricted by criteria on ScheduleDefinition.
+    Columns: schedule_id, team_id, version, rn; rn == 1 is the current
+    schedule.
+    """
+    return (
+        select(
+            ScheduleDefinition.id.label("schedule_id"),
+            ScheduleDefinition.team_id.label("team_id"),
+            ScheduleDefinition.version.label("version"),
+            func.row_number()
+            .over(
+                partition_by=(ScheduleDefinition.team_id, ScheduleDefinition.year),
+                order_by=(
+                    ScheduleDefinition.created_at.desc(),
+                    ScheduleDefinition.id.desc(),
+                ),
+            )
+            .label("rn"),
         )
-        pto_by_person: Dict[int, Set] = {}
+        .where(*criteria)
+        .subquery()
+    )
+
+
+def first_row_per_team(rows) -> List[Tuple[int, int, OnCallSlot, Person, Optional[Person]]]:
+    result = []
+    seen: Set[int] = set()
+    for schedule_id, team_id, slot, p, sec in rows:
+        if team_id in seen:
+            continue
+        seen.add(team_id)
+        result.append((schedule_id, team_id, slot, p, sec))
+    return result
+
+
+def referenced_person_ids(slots) -> Set[int]:
+    person_ids: Set[int] = set()
+    for s in slots:
+        person_ids.add(s.primary_person_id)
+        if s.secondary_person_id is not None:
+            person_ids.add(s.secondary_person_id)
+    return person_ids
+
+
+def build_snapshot(sched: ScheduleDefinition, slots, people) -> ScheduleSnapshot:
+    return ScheduleSnapshot(
+        schedule_id=sched.id,
+        team_id=sched.team_id,
+        year=sched.year,
+        slots=[OnCallSlotRead.model_validate(s) for s in slots],
+        people={p.id: PersonRead.model_validate(p) for p in people},
+    )
+
+
+# Row count at which _insert_slots switches to COPY on Postgres (0 disables).
+SLOT_COPY_MIN_ROWS = int(os.getenv("SLOT_COPY_MIN_ROWS", "200"))
+
+_SLOT_COPY_COLUMNS = (
+    "schedule_id",
+    "slot",
+    "start",
+    "end",
+    "primary_person_id",
+    "secondary_person_id",
+    "reminded",
+    "is_override",
+)
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _copy_slots(conn, rows: List[Dict[str, Any]]) -> None:
+    """COPY slot rows through the session's own DBAPI connection, so they
+    land in the same transaction as the rest of the unit of work."""
+    buf = StringIO()
+    for r in rows:
+        buf.write("\t".join(_copy_value(r[c]) for c in _SLOT_COPY_COLUMNS))
+        buf.write("\n")
+    buf.seek(0)
+
+    columns = ", ".join(f'"{c}"' for c in _SLOT_COPY_COLUMNS)
+    dbapi_conn = conn.connection.dbapi_connection
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {OnCallSlot.__tablename__} ({columns}) FROM STDIN", buf
+        )
+
+
+def _slot_rows(schedule_id: int, raw_slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "schedule_id": schedule_id,
+            "slot": s["slot"],
+            "start": s["start"],
+            "end": s["end"],
+            "primary_person_id": s["primary_person_id"],
+            "secondary_person_id": s["secondary_person_id"],
+            "reminded": False,
+            "is_override": False,
+        }
+        for s in raw_slots
+    ]
+
+
+def _db_error_message(exc: SQLAlchemyError) -> str:
+    """The driver's message without SQLAlchemy's statement/parameter dump."""
+    message = str(getattr(exc, "orig", None) or exc).strip()
+    return message.splitlines()[0][:500] if message else type(exc).__name__
 
-        for p in ptos:
-            d = p.start_date
-            while d <= p.end_date:
-                if d.year == year:
-                    pto_by_person.setdefault(p.person_id, set()).add(d)
-                d += timedelta(days=1)
-        return pto_by_person
 
-# ----- Schedules -----
 class SchedulesRepositoryDB:
     def __init__(self, db: Session):
         self.db = db
@@ -252,7 +621,9 @@ class SchedulesRepositoryDB:
         week_starts_on: int,
         custom_start_date,
         person_ids: List[int],
-        pto_by_person: Dict[int, Set],
+        pto_by_person: PTOByPerson,
+        engine: str = "round_robin",
+        weights: Optional[Dict[int, float]] = None,
     ) -> int:
         definition = ScheduleDefinition(
             team_id=team_id,
@@ -264,7 +635,9 @@ class SchedulesRepositoryDB:
         self.db.add(definition)
         self.db.flush()  # get definition.id
 
-        raw_slots = generate_oncall_slots(
+        raw_slots = generate_slots(
+            engine=engine,
+            weights=weights,
             people_ids=person_ids,
             year=year,
             rotation_days=rotation_days,
@@ -274,29 +647,116 @@ class SchedulesRepositoryDB:
             assign_secondary=True,
         )
 
-        for s in raw_slots:
-            self.db.add(
-                OnCallSlot(
-                    schedule_id=definition.id,
-                    slot=s["slot"],
-                    start=s["start"],
-                    end=s["end"],
-                    primary_person_id=s["primary_person_id"],
-                    secondary_person_id=s["secondary_person_id"],
-                )
-            )
+        schedule_id = definition.id
+        self._insert_slots(schedule_id, raw_slots)
         self.db.commit()
-        return definition.id
+        oncall_resolver.invalidate_team(team_id)
+        return schedule_id
+
+    def create_schedules_bulk(
+        self,
+        entries: List[Dict[str, Any]],
+        batch_size: int = 50,
+    ) -> List[Tuple[Optional[int], Optional[str]]]:
+        """
+        Persist many pre-generated schedules. Each entry holds the
+        ScheduleDefinition fields (team_id, year, rotation_days, week_starts_on,
+        custom_start_date) plus "slots" from generate_slots.
+
+        Each batch of batch_size schedules is written with one definitions
+        INSERT and one slots INSERT (or COPY) inside a savepoint, then
+        committed. If the batch fails it is retried one entry per savepoint,
+        so only the entries that fail themselves are lost.
+
+        Returns [(schedule_id, error), ...] in the same order as entries.
+        """
+        results: List[Tuple[Optional[int], Optional[str]]] = []
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i : i + batch_size]
+            try:
+                with self.db.begin_nested():
+                    batch_results = [(sid, None) for sid in self._persist_schedules(batch)]
+            except SQLAlchemyError:
+                batch_results = []
+                for e in batch:
+                    try:
+                        with self.db.begin_nested():
+                            (schedule_id,) = self._persist_schedules([e])
+                        batch_results.append((schedule_id, None))
+                    except SQLAlchemyError as exc:
+                        batch_results.append((None, _db_error_message(exc)))
+            try:
+                self.db.commit()
+            except SQLAlchemyError as exc:
+                self.db.rollback()
+                batch_results = [(None, _db_error_message(exc))] * len(batch)
+            results.extend(batch_results)
+            for team_id in {e["team_id"] for e, (sid, _) in zip(batch, batch_results) if sid}:
+                oncall_resolver.invalidate_team(team_id)
+        return results
+
+    def _persist_schedules(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """One INSERT .. RETURNING for the definitions (ids in entry order),
+        then one write for all their slots."""
+        ids = list(
+            self.db.scalars(
+                insert(ScheduleDefinition).returning(
+                    ScheduleDefinition.id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "team_id": e["team_id"],
+                        "year": e["year"],
+                        "rotation_days": e["rotation_days"],
+                        "week_starts_on": e["week_starts_on"],
+                        "custom_start_date": e["custom_start_date"],
+                    }
+                    for e in entries
+                ],
+            )
+        )
+        self._write_slot_rows(
+            [row for sid, e in zip(ids, entries) for row in _slot_rows(sid, e["slots"])]
+        )
+        return ids
+
+    def _insert_slots(self, schedule_id: int, raw_slots: List[Dict[str, Any]]) -> None:
+        self._write_slot_rows(_slot_rows(schedule_id, raw_slots))
+
+    def _write_slot_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Set-based write of slot rows inside the current transaction:
+        COPY on psycopg2 for large batches, otherwise a Core executemany.
+        Skips the ORM unit of work entirely.
+        """
+        if not rows:
+            return
+        conn = self.db.connection()
+        if (
+            SLOT_COPY_MIN_ROWS > 0
+            and len(rows) >= SLOT_COPY_MIN_ROWS
+            and conn.dialect.name == "postgresql"
+            and conn.dialect.driver == "psycopg2"
+        ):
+            _copy_slots(conn, rows)
+        else:
+            conn.execute(insert(OnCallSlot.__table__), rows)
 
     def get_schedule(self, schedule_id: int) -> Optional[ScheduleDefinition]:
         return self.db.get(ScheduleDefinition, schedule_id)
 
-    def get_slots(self, schedule_id: int) -> List[OnCallSlot]:
-        sched = self.db.get(ScheduleDefinition, schedule_id)
-        if not sched:
-            return []
-        # already ordered by slot due to UniqueConstraint semantics in practice
-        return sorted(sched.slots, key=lambda s: s.slot)
+    def get_slots(
+        self,
+        schedule_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        slot_from: Optional[int] = None,
+        slot_to: Optional[int] = None,
+    ) -> List[OnCallSlot]:
+        """Slots ordered by slot number, optionally windowed (see slots_stmt)."""
+        return list(
+            self.db.scalars(slots_stmt(schedule_id, start, end, slot_from, slot_to)).all()
+        )
     
     def delete_schedule(self, schedule_id: int) -> bool:
         definition = self.db.get(ScheduleDefinition, schedule_id)
@@ -309,8 +769,11 @@ class SchedulesRepositoryDB:
             .filter(OnCallSlot.schedule_id == schedule_id)
             .delete()
         )
+        team_id = definition.team_id
         self.db.delete(definition)
         self.db.commit()
+        self._schedule_changed(schedule_id)
+        oncall_resolver.invalidate_team(team_id)
         return True
 
     def apply_override(
@@ -330,14 +793,257 @@ class SchedulesRepositoryDB:
             raise KeyError("slot not found")
         if primary_person_id is not None:
             slot.primary_person_id = primary_person_id
+            slot.is_override = True
         if secondary_person_id is not None:
             slot.secondary_person_id = secondary_person_id
+            slot.is_override = True
         if notes is not None:
             slot.notes = notes
+        self._bump_version(schedule_id)
         self.db.commit()
+        self._schedule_changed(schedule_id)
         self.db.refresh(slot)
         return slot
     
+    def apply_overrides(
+        self, schedule_id: int, overrides: List[OverrideRequest]
+    ) -> List[OnCallSlot]:
+        """
+        Apply many overrides in one transaction, all-or-nothing.
+
+        Referenced people are validated with one IN query and target slots
+        loaded with another; the batch is applied in request order (a later
+        entry for the same slot wins) and committed once.
+
+        Raises ValueError for unknown people, KeyError for unknown slots and
+        SlotConflictError if a slot would end up with the same primary and
+        secondary; nothing is written in any of these cases.
+        """
+        person_ids = {
+            pid
+            for o in overrides
+            for pid in (o.primary_person_id, o.secondary_person_id)
+            if pid is not None
+        }
+        if person_ids:
+            found = set(self.db.scalars(select(Person.id).where(Person.id.in_(person_ids))))
+            missing = sorted(person_ids - found)
+            if missing:
+                raise ValueError(f"Person(s) not found: {missing}")
+
+        slot_nums = {o.slot for o in overrides}
+        slots_by_num = {
+            s.slot: s
+            for s in self.db.scalars(
+                select(OnCallSlot).where(
+                    OnCallSlot.schedule_id == schedule_id,
+                    OnCallSlot.slot.in_(slot_nums),
+                )
+            )
+        }
+        missing_slots = sorted(slot_nums - slots_by_num.keys())
+        if missing_slots:
+            raise KeyError(f"Slot(s) not found: {missing_slots}")
+
+        touched = [slots_by_num[n] for n in dict.fromkeys(o.slot for o in overrides)]
+        # read before commit expires them, or each .id would be a SELECT
+        slot_ids = [slot.id for slot in touched]
+        try:
+            for o in overrides:
+                slot = slots_by_num[o.slot]
+                if o.primary_person_id is not None:
+                    slot.primary_person_id = o.primary_person_id
+                    slot.is_override = True
+                if o.secondary_person_id is not None:
+                    slot.secondary_person_id = o.secondary_person_id
+                    slot.is_override = True
+                if o.notes is not None:
+                    slot.notes = o.notes
+            conflicts = [
+                slot.slot
+                for slot in touched
+                if slot.primary_person_id == slot.secondary_person_id
+            ]
+            if conflicts:
+                raise SlotConflictError(
+                    "Update would make the same person primary and secondary "
+                    f"in slot(s) {', '.join(map(str, conflicts))}"
+                )
+            self._bump_version(schedule_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self._schedule_changed(schedule_id)
+
+        # one query to reload every (expired) slot instead of a refresh each
+        by_id = {
+            s.id: s
+            for s in self.db.scalars(select(OnCallSlot).where(OnCallSlot.id.in_(slot_ids)))
+        }
+        return [by_id[i] for i in slot_ids]
+
+    # ----- set-based slot operations -----
+    # Each is a single UPDATE statement (plus the version bump) in one
+    # transaction, however many slots it touches. All of them mark the
+    # touched slots as manual overrides.
+
+    @staticmethod
+    def _scope_columns(scope: str) -> List[str]:
+        return {
+            "primary": ["primary_person_id"],
+            "secondary": ["secondary_person_id"],
+            "both": ["primary_person_id", "secondary_person_id"],
+        }[scope]
+
+    def _commit_slot_update(self, schedule_id: int, stmt, touched: Sequence[Any]) -> int:
+        """
+        Run a set-based slot UPDATE and commit it with a version bump.
+        `touched` are criteria selecting the updated rows after the UPDATE;
+        if any of them now has the same person as primary and secondary,
+        everything is rolled back and SlotConflictError raised.
+        """
+        try:
+            updated = self.db.execute(
+                stmt, execution_options={"synchronize_session": False}
+            ).rowcount
+            if updated:
+                conflicts = self.db.scalars(
+                    select(OnCallSlot.slot)
+                    .where(
+                        OnCallSlot.schedule_id == schedule_id,
+                        *touched,
+                        OnCallSlot.primary_person_id == OnCallSlot.secondary_person_id,
+                    )
+                    .order_by(OnCallSlot.slot)
+                    .limit(10)
+                ).all()
+                if conflicts:
+                    raise SlotConflictError(
+                        "Update would make the same person primary and secondary "
+                        f"in slot(s) {', '.join(map(str, conflicts))}"
+                    )
+                self._bump_version(schedule_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if updated:
+            self._schedule_changed(schedule_id)
+        return updated
+
+    def swap_slots(self, schedule_id: int, slot_a: int, slot_b: int, scope: str = "both") -> int:
+        """
+        Exchange the assignments of two slots with one self-joined UPDATE.
+        Raises KeyError if either slot does not exist, SlotConflictError if
+        a slot would end up with the same primary and secondary.
+        """
+        if slot_a == slot_b:
+            return 0
+        found = self.db.scalar(
+            select(func.count()).where(
+                OnCallSlot.schedule_id == schedule_id,
+                OnCallSlot.slot.in_([slot_a, slot_b]),
+            )
+        )
+        if found != 2:
+            raise KeyError("slot not found")
+
+        src = aliased(OnCallSlot)
+        stmt = (
+            update(OnCallSlot)
+            .where(
+                OnCallSlot.schedule_id == schedule_id,
+                OnCallSlot.slot.in_([slot_a, slot_b]),
+                src.schedule_id == schedule_id,
+                src.slot == case((OnCallSlot.slot == slot_a, slot_b), else_=slot_a),
+            )
+            .values(
+                {c: getattr(src, c) for c in self._scope_columns(scope)}
+                | {"is_override": True}
+            )
+        )
+        return self._commit_slot_update(
+            schedule_id, stmt, [OnCallSlot.slot.in_([slot_a, slot_b])]
+        )
+
+    def rotate_slots(
+        self,
+        schedule_id: int,
+        from_slot: int,
+        to_slot: Optional[int],
+        offset: int,
+        scope: str = "both",
+    ) -> int:
+        """
+        Move assignments `offset` positions forward within slots
+        from_slot..to_slot (to the end when to_slot is None), wrapping
+        around. Positions are taken in slot order, so gaps left by deleted
+        slots are skipped. One UPDATE ... FROM joining a row_number()
+        ranking of the range to itself.
+        """
+        ranked = select(
+            OnCallSlot.id,
+            OnCallSlot.primary_person_id,
+            OnCallSlot.secondary_person_id,
+            (func.row_number().over(order_by=OnCallSlot.slot) - 1).label("rn"),
+            func.count().over().label("cnt"),
+        ).where(OnCallSlot.schedule_id == schedule_id, OnCallSlot.slot >= from_slot)
+        touched = [OnCallSlot.slot >= from_slot]
+        if to_slot is not None:
+            ranked = ranked.where(OnCallSlot.slot <= to_slot)
+            touched.append(OnCallSlot.slot <= to_slot)
+        tgt = ranked.subquery("tgt")
+        src = ranked.subquery("src")
+
+        stmt = (
+            update(OnCallSlot)
+            .where(
+                OnCallSlot.id == tgt.c.id,
+                # ((rn - offset) mod cnt), kept non-negative for any offset
+                src.c.rn == ((tgt.c.rn - offset) % tgt.c.cnt + tgt.c.cnt) % tgt.c.cnt,
+            )
+            .values(
+                {c: src.c[c] for c in self._scope_columns(scope)}
+                | {"is_override": True}
+            )
+        )
+        return self._commit_slot_update(schedule_id, stmt, touched)
+
+    def exchange_people(
+        self,
+        schedule_id: int,
+        person_a_id: int,
+        person_b_id: int,
+        from_slot: Optional[int] = None,
+        to_slot: Optional[int] = None,
+        scope: str = "both",
+    ) -> int:
+        """
+        Swap two people wherever either is assigned within the slot range,
+        with one UPDATE using CASE per column.
+        """
+        columns = self._scope_columns(scope)
+        values: Dict[str, Any] = {"is_override": True}
+        touches = []
+        for c in columns:
+            col = getattr(OnCallSlot, c)
+            values[c] = case(
+                (col == person_a_id, person_b_id),
+                (col == person_b_id, person_a_id),
+                else_=col,
+            )
+            touches.append(col.in_([person_a_id, person_b_id]))
+
+        # still selects the touched rows afterwards: a and b trade places
+        touched = [or_(*touches)]
+        if from_slot is not None:
+            touched.append(OnCallSlot.slot >= from_slot)
+        if to_slot is not None:
+            touched.append(OnCallSlot.slot <= to_slot)
+        stmt = update(OnCallSlot).where(OnCallSlot.schedule_id == schedule_id, *touched)
+        return self._commit_slot_update(schedule_id, stmt.values(values), touched)
+
     def get_slots_with_people(self, schedule_id: int) -> List[OnCallSlot]:
         """
         Return slots for a schedule and attach convenience attributes:
@@ -382,79 +1088,127 @@ class SchedulesRepositoryDB:
 
         return slots
 
-    def get_oncall_now_for_schedule(self, schedule_id: int):
+    def iter_export_rows(self, schedule_id: int, batch_size: int = 500) -> Iterator[Row]:
         """
-        Return (schedule, slot, primary_person, secondary_person) for the
-        given schedule_id and today's date, or None if not found.
+        Stream a schedule's slots joined with both people's name/email,
+        ordered by slot. Fetched yield_per batch_size (server-side cursor on
+        Postgres) so no full slot list or ORM objects are materialised.
         """
-        today = date.today()
-
-        sched = self.db.get(ScheduleDefinition, schedule_id)
-        if not sched:
-            return None
-
-        slot = (
-            self.db.query(OnCallSlot)
-            .filter(
-                OnCallSlot.schedule_id == schedule_id,
-                OnCallSlot.start <= today,
-                OnCallSlot.end >= today,
+        primary = aliased(Person)
+        secondary = aliased(Person)
+        stmt = (
+            select(
+                OnCallSlot.slot,
+                OnCallSlot.start,
+                OnCallSlot.end,
+                OnCallSlot.primary_person_id,
+                primary.name.label("primary_name"),
+                primary.email.label("primary_email"),
+                OnCallSlot.secondary_person_id,
+                secondary.name.label("secondary_name"),
+                secondary.email.label("secondary_email"),
+                OnCallSlot.notes,
             )
-            .first()
+            .outerjoin(primary, primary.id == OnCallSlot.primary_person_id)
+            .outerjoin(secondary, secondary.id == OnCallSlot.secondary_person_id)
+            .where(OnCallSlot.schedule_id == schedule_id)
+            .order_by(OnCallSlot.slot)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from self.db.execute(stmt)
+
+    def _bump_version(self, schedule_id: int) -> None:
+        """Increment the schedule's version in the current transaction."""
+        self.db.execute(
+            update(ScheduleDefinition)
+            .where(ScheduleDefinition.id == schedule_id)
+            .values(version=ScheduleDefinition.version + 1)
         )
-        if not slot:
-            return None
 
-        primary = self.db.get(Person, slot.primary_person_id)
-        secondary = (
-            self.db.get(Person, slot.secondary_person_id)
-            if slot.secondary_person_id is not None
-            else None
+    def _schedule_changed(self, schedule_id: int) -> None:
+        """Drop cached state derived from this schedule's slots (call after commit)."""
+        oncall_resolver.invalidate_schedule(schedule_id)
+        export_cache.invalidate_schedule(schedule_id)
+
+    def _load_snapshot(self, sched: ScheduleDefinition) -> ScheduleSnapshot:
+        """Load every slot of sched plus the referenced people (two queries)."""
+        slots = self.db.scalars(slots_stmt(sched.id)).all()
+        person_ids = referenced_person_ids(slots)
+        people = (
+            self.db.scalars(select(Person).where(Person.id.in_(person_ids))).all()
+            if person_ids
+            else []
         )
-        return sched, slot, primary, secondary
+        return build_snapshot(sched, slots, people)
+
+    def get_oncall_now_for_schedule(self, schedule_id: int):
+        """
+        Return (schedule snapshot, slot, primary_person, secondary_person)
+        for the given schedule_id and today's date, or None if not found.
+
+        Served from the process-local resolver; the database is only hit
+        when the schedule is not cached yet.
+        """
+        snap = oncall_resolver.get_schedule(schedule_id)
+        if snap is None:
+            generation = oncall_resolver.generation()
+            sched = self.db.get(ScheduleDefinition, schedule_id)
+            if not sched:
+                return None
+            snap = self._load_snapshot(sched)
+            oncall_resolver.put(snap, generation)
+
+        resolved = snap.resolve(date.today())
+        if not resolved:
+            return None
+        return (snap, *resolved)
 
     def get_oncall_now_for_team(self, team_id: int, year: int | None = None):
         """
-        Return (schedule, slot, primary_person, secondary_person) for a team
-        in the given year (defaults to current year) for today's date.
+        Return (schedule snapshot, slot, primary_person, secondary_person)
+        for a team in the given year (defaults to current year) for today's
+        date.
+
+        Served from the process-local resolver like
+        get_oncall_now_for_schedule.
         """
         today = date.today()
         if year is None:
             year = today.year
 
-        sched = (
-            self.db.query(ScheduleDefinition)
-            .filter(
-                ScheduleDefinition.team_id == team_id,
-                ScheduleDefinition.year == year,
-            )
-            .order_by(ScheduleDefinition.created_at.desc())
-            .first()
-        )
-        if not sched:
+        snap = oncall_resolver.get_team_schedule(team_id, year)
+        if snap is None:
+            generation = oncall_resolver.generation()
+            sched = self.db.scalars(current_schedule_stmt(team_id, year)).first()
+            if not sched:
+                return None
+            snap = self._load_snapshot(sched)
+            oncall_resolver.put(snap, generation, current_for_team=True)
+
+        resolved = snap.resolve(today)
+        if not resolved:
             return None
-
-        slot = (
-            self.db.query(OnCallSlot)
-            .filter(
-                OnCallSlot.schedule_id == sched.id,
-                OnCallSlot.start <= today,
-                OnCallSlot.end >= today,
-            )
-            .first()
-        )
-        if not slot:
-            return None
-
-        primary = self.db.get(Person, slot.primary_person_id)
-        secondary = (
-            self.db.get(Person, slot.secondary_person_id)
-            if slot.secondary_person_id is not None
-            else None
-        )
-        return sched, slot, primary, secondary
+        return (snap, *resolved)
     
     
+    def get_oncall_now_for_teams(
+        self, team_ids: Optional[List[int]] = None, year: int | None = None
+    ) -> List[Tuple[int, int, OnCallSlot, Person, Optional[Person]]]:
+        """
+        Batched get_oncall_now_for_team: one query for every team (or only
+        team_ids) regardless of team count. The latest schedule per team is
+        picked with a window function, then joined to today's slot and both
+        people.
+
+        Returns [(schedule_id, team_id, slot, primary, secondary), ...] for
+        teams that have an active slot today, ordered by team_id.
+        """
+        today = date.today()
+        if year is None:
+            year = today.year
+        rows = self.db.execute(oncall_now_for_teams_stmt(team_ids, year, today)).all()
+        return first_row_per_team(rows)
+
     def get_schedule_for_team_year(
         self, team_id: int, year: int
     ) -> Optional[ScheduleDefinition]:
@@ -462,15 +1216,7 @@ class SchedulesRepositoryDB:
         Return the most recently-created schedule for a given team & year,
         or None if none exist.
         """
-        return (
-            self.db.query(ScheduleDefinition)
-            .filter(
-                ScheduleDefinition.team_id == team_id,
-                ScheduleDefinition.year == year,
-            )
-            .order_by(ScheduleDefinition.id.desc())
-            .first()
-        )
+        return self.db.scalars(latest_schedule_stmt(team_id, year)).first()
 
     def person_usage(self, schedule_id: int, person_id: int) -> dict:
         q_primary = (
@@ -511,26 +1257,37 @@ class SchedulesRepositoryDB:
           - 'both'      → both columns
         """
         q = self.db.query(OnCallSlot).filter(OnCallSlot.schedule_id == schedule_id)
+        updated = 0
 
         if body.scope in ("primary", "both"):
-            (
+            updated += (
                 q.filter(OnCallSlot.primary_person_id == body.from_person_id)
                 .update(
-                    {OnCallSlot.primary_person_id: body.to_person_id},
+                    {
+                        OnCallSlot.primary_person_id: body.to_person_id,
+                        OnCallSlot.is_override: True,
+                    },
                     synchronize_session=False,
                 )
             )
 
         if body.scope in ("secondary", "both"):
-            (
+            updated += (
                 q.filter(OnCallSlot.secondary_person_id == body.from_person_id)
                 .update(
-                    {OnCallSlot.secondary_person_id: body.to_person_id},
+                    {
+                        OnCallSlot.secondary_person_id: body.to_person_id,
+                        OnCallSlot.is_override: True,
+                    },
                     synchronize_session=False,
                 )
             )
 
+        if updated:
+            self._bump_version(schedule_id)
         self.db.commit()
+        if updated:
+            self._schedule_changed(schedule_id)
 
 
     def remove_person(self, schedule_id: int, person_id: int) -> None:
@@ -556,6 +1313,7 @@ class SchedulesRepositoryDB:
         )
 
         for slot in slots:
+            slot.is_override = True
             # Case 1: person is primary
             if slot.primary_person_id == person_id:
                 if slot.secondary_person_id is not None:
@@ -574,4 +1332,473 @@ class SchedulesRepositoryDB:
             if slot.secondary_person_id == person_id:
                 slot.secondary_person_id = None
 
+        if slots:
+            self._bump_version(schedule_id)
         self.db.commit()
+        if slots:
+            self._schedule_changed(schedule_id)
+
+    # ----- PTO re-planning -----
+
+    def replan_for_pto(
+        self, person_id: int, start: date, end: date
+    ) -> Tuple[List[PTOReplanChange], List[PTOReplanChange]]:
+        """
+        Reassign only the slots a new PTO interval conflicts with.
+
+        Looks at the current schedule (newest by created_at, as on-call-now
+        uses) of each of the person's teams for every year the interval
+        touches, and at slots overlapping [start, end] where the person is
+        primary or secondary and that are not manual overrides. Each role
+        goes to another team member who is free for the whole slot, chosen
+        by: not on call in a neighbouring slot, fewest slots picked up in
+        this re-plan, then team order after the person being replaced.
+        A secondary with no free replacement is cleared; a primary with none
+        is left as is and reported as unresolved.
+
+        Queries are bounded by the affected slots and the teams' members,
+        not by schedule length. Everything is written in one transaction.
+
+        Returns (changes, unresolved).
+        """
+        ranked = current_schedules_subquery(
+            ScheduleDefinition.team_id.in_(
+                select(TeamMembership.team_id).where(TeamMembership.person_id == person_id)
+            ),
+            ScheduleDefinition.year.between(start.year, end.year),
+        )
+        affected = self.db.execute(
+            select(OnCallSlot, ranked.c.team_id)
+            .join(ranked, ranked.c.schedule_id == OnCallSlot.schedule_id)
+            .where(
+                ranked.c.rn == 1,
+                OnCallSlot.start <= end,
+                OnCallSlot.end >= start,
+                or_(
+                    OnCallSlot.primary_person_id == person_id,
+                    OnCallSlot.secondary_person_id == person_id,
+                ),
+                OnCallSlot.is_override.is_(False),
+            )
+            .order_by(OnCallSlot.schedule_id, OnCallSlot.slot)
+        ).all()
+        if not affected:
+            return [], []
+
+        team_ids = {team_id for _, team_id in affected}
+        members_by_team: Dict[int, List[int]] = {}
+        for team_id, pid in self.db.execute(
+            select(TeamMembership.team_id, TeamMembership.person_id)
+            .where(TeamMembership.team_id.in_(team_ids))
+            .order_by(TeamMembership.id)
+        ):
+            members_by_team.setdefault(team_id, []).append(pid)
+
+        window_start = min(s.start for s, _ in affected)
+        window_end = max(s.end for s, _ in affected)
+        all_members = {pid for pids in members_by_team.values() for pid in pids}
+        raw_pto: Dict[int, List[PTOInterval]] = {}
+        for pid, s, e in self.db.execute(
+            select(PTO.person_id, PTO.start_date, PTO.end_date).where(
+                PTO.person_id.in_(all_members),
+                PTO.start_date <= window_end,
+                PTO.end_date >= window_start,
+            )
+        ):
+            raw_pto.setdefault(pid, []).append((s, e))
+        pto_by_person = {pid: merge_pto_intervals(ivs) for pid, ivs in raw_pto.items()}
+
+        # who is on call in the slots either side of each affected slot
+        neighbour_nums: Dict[int, Set[int]] = {}
+        for s, _ in affected:
+            neighbour_nums.setdefault(s.schedule_id, set()).update((s.slot - 1, s.slot + 1))
+        on_call: Dict[Tuple[int, int], Set[int]] = {}
+        for schedule_id, slot_num, p, sec in self.db.execute(
+            select(
+                OnCallSlot.schedule_id,
+                OnCallSlot.slot,
+                OnCallSlot.primary_person_id,
+                OnCallSlot.secondary_person_id,
+            ).where(
+                or_(
+                    *(
+                        and_(OnCallSlot.schedule_id == sid, OnCallSlot.slot.in_(nums))
+                        for sid, nums in neighbour_nums.items()
+                    )
+                )
+            )
+        ):
+            on_call[(schedule_id, slot_num)] = {p, sec}
+
+        picked: Dict[int, int] = {}
+        changes: List[PTOReplanChange] = []
+        unresolved: List[PTOReplanChange] = []
+        updates: List[Dict[str, Any]] = []
+
+        def pick(slot: OnCallSlot, team_id: int, exclude: Set[Optional[int]]) -> Optional[int]:
+            members = members_by_team.get(team_id, [])
+            n = len(members)
+            after = members.index(person_id) + 1 if person_id in members else 0
+            adjacent = on_call.get((slot.schedule_id, slot.slot - 1), set()) | on_call.get(
+                (slot.schedule_id, slot.slot + 1), set()
+            )
+            best = None
+            for i in range(n):
+                pid = members[(after + i) % n]
+                if pid in exclude or overlaps_pto(
+                    slot.start, slot.end, pto_by_person.get(pid, ())
+                ):
+                    continue
+                key = (pid in adjacent, picked.get(pid, 0), i)
+                if best is None or key < best[0]:
+                    best = (key, pid)
+            if best is None:
+                return None
+            picked[best[1]] = picked.get(best[1], 0) + 1
+            return best[1]
+
+        for slot, team_id in affected:
+            primary = slot.primary_person_id
+            secondary = slot.secondary_person_id
+            base = dict(
+                schedule_id=slot.schedule_id,
+                team_id=team_id,
+                slot=slot.slot,
+                start=slot.start,
+                end=slot.end,
+                old_person_id=person_id,
+            )
+            if primary == person_id:
+                new = pick(slot, team_id, {person_id, secondary})
+                if new is None:
+                    unresolved.append(PTOReplanChange(role="primary", **base))
+                else:
+                    primary = new
+                    changes.append(PTOReplanChange(role="primary", new_person_id=new, **base))
+            if secondary == person_id:
+                secondary = pick(slot, team_id, {person_id, primary})
+                changes.append(
+                    PTOReplanChange(role="secondary", new_person_id=secondary, **base)
+                )
+            if (primary, secondary) != (slot.primary_person_id, slot.secondary_person_id):
+                updates.append({"b_id": slot.id, "b_primary": primary, "b_secondary": secondary})
+
+        if not updates:
+            return changes, unresolved
+
+        changed_schedules = {c.schedule_id for c in changes}
+        slots_table = OnCallSlot.__table__
+        try:
+            self.db.execute(
+                update(slots_table)
+                .where(slots_table.c.id == bindparam("b_id"))
+                .values(
+                    primary_person_id=bindparam("b_primary"),
+                    secondary_person_id=bindparam("b_secondary"),
+                ),
+                updates,
+            )
+            for schedule_id in changed_schedules:
+                self._bump_version(schedule_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        for schedule_id in changed_schedules:
+            self._schedule_changed(schedule_id)
+        return changes, unresolved
+
+    # ----- Per-person feed -----
+
+    @staticmethod
+    def _person_feed_schedules(person_id: int, start: date, end: date):
+        """Current schedules of the person's teams for the years [start, end] touches."""
+        return current_schedules_subquery(
+            ScheduleDefinition.team_id.in_(
+                select(TeamMembership.team_id).where(TeamMembership.person_id == person_id)
+            ),
+            ScheduleDefinition.year.between(start.year, end.year),
+        )
+
+    def person_feed_versions(self, person_id: int, start: date, end: date) -> List[Tuple[int, int]]:
+        """
+        (schedule_id, version) of every schedule the person's feed for
+        [start, end] is built from. Any slot edit bumps a version, and a new
+        schedule or a membership change changes the set, so this is enough
+        to validate a cached feed without reading slots.
+        """
+        ranked = self._person_feed_schedules(person_id, start, end)
+        return [
+            (schedule_id, version)
+            for schedule_id, version in self.db.execute(
+                select(ranked.c.schedule_id, ranked.c.version)
+                .where(ranked.c.rn == 1)
+                .order_by(ranked.c.schedule_id)
+            )
+        ]
+
+    def person_feed_rows(self, person_id: int, start: date, end: date) -> List[Row]:
+        """
+        The person's primary and secondary slots overlapping [start, end]
+        across their teams' current schedules, in one query, ordered by
+        start. Rows carry the team name and both people's names.
+        """
+        ranked = self._person_feed_schedules(person_id, start, end)
+        primary = aliased(Person)
+        secondary = aliased(Person)
+        stmt = (
+            select(
+                OnCallSlot.schedule_id,
+                OnCallSlot.slot,
+                OnCallSlot.start,
+                OnCallSlot.end,
+                OnCallSlot.primary_person_id,
+                primary.name.label("primary_name"),
+                OnCallSlot.secondary_person_id,
+                secondary.name.label("secondary_name"),
+                Team.name.label("team_name"),
+            )
+            .join(ranked, ranked.c.schedule_id == OnCallSlot.schedule_id)
+            .join(Team, Team.id == ranked.c.team_id)
+            .outerjoin(primary, primary.id == OnCallSlot.primary_person_id)
+            .outerjoin(secondary, secondary.id == OnCallSlot.secondary_person_id)
+            .where(
+                ranked.c.rn == 1,
+                or_(
+                    OnCallSlot.primary_person_id == person_id,
+                    OnCallSlot.secondary_person_id == person_id,
+                ),
+                OnCallSlot.start <= end,
+                OnCallSlot.end >= start,
+            )
+            .order_by(OnCallSlot.start, OnCallSlot.schedule_id, OnCallSlot.slot)
+        )
+        return list(self.db.execute(stmt))
+
+    # ----- Reminders -----
+
+    def claim_due_reminders(self, start_from: date, start_to: date, limit: int) -> List[Row]:
+        """
+        Lock and return up to `limit` slots of current schedules starting in
+        [start_from, start_to] that have not been reminded yet, earliest
+        first, with the team name and both people's names and emails.
+
+        The reminded/start predicate is served by the partial index
+        ix_oncall_slots_unreminded_start. On Postgres the slot rows are
+        locked FOR UPDATE SKIP LOCKED, so concurrent dispatchers in other
+        workers each claim a disjoint batch; the locks are held until the
+        caller commits (mark_reminded) or rolls back.
+        """
+        ranked = current_schedules_subquery(
+            ScheduleDefinition.year.between(start_from.year, start_to.year)
+        )
+        primary = aliased(Person)
+        secondary = aliased(Person)
+        stmt = (
+            select(
+                OnCallSlot.id,
+                OnCallSlot.schedule_id,
+                OnCallSlot.slot,
+                OnCallSlot.start,
+                OnCallSlot.end,
+                Team.id.label("team_id"),
+                Team.name.label("team_name"),
+                primary.name.label("primary_name"),
+                primary.email.label("primary_email"),
+                secondary.name.label("secondary_name"),
+                secondary.email.label("secondary_email"),
+            )
+            .join(ranked, ranked.c.schedule_id == OnCallSlot.schedule_id)
+            .join(Team, Team.id == ranked.c.team_id)
+            .join(primary, primary.id == OnCallSlot.primary_person_id)
+            .outerjoin(secondary, secondary.id == OnCallSlot.secondary_person_id)
+            .where(
+                ranked.c.rn == 1,
+                OnCallSlot.reminded == false(),
+                OnCallSlot.start >= start_from,
+                OnCallSlot.start <= start_to,
+            )
+            .order_by(OnCallSlot.start, OnCallSlot.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=OnCallSlot)
+        )
+        return list(self.db.execute(stmt))
+
+    def mark_reminded(self, slot_ids: Sequence[int]) -> int:
+        """Set reminded on the given slots in one UPDATE and commit, releasing
+        the claim locks. Not a schedule change: no version bump."""
+        if not slot_ids:
+            self.db.commit()
+            return 0
+        try:
+            result = self.db.execute(
+                update(OnCallSlot)
+                .where(OnCallSlot.id.in_(slot_ids))
+                .values(reminded=True)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return result.rowcount
+
+
+# ----- Notification outbox -----
+class OutboxRepositoryDB:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, messages: Sequence[Dict[str, Any]]) -> int:
+        """
+        Add messages (channel, recipient, subject, body) to the outbox in the
+        current transaction; the caller commits, so they are only delivered
+        if whatever produced them commits too.
+        """
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        self.db.execute(
+            insert(NotificationOutbox.__table__),
+            [
+                {
+                    "channel": m["channel"],
+                    "recipient": m.get("recipient"),
+                    "subject": m.get("subject"),
+                    "body": m["body"],
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }
+                for m in messages
+            ],
+        )
+        return len(messages)
+
+    def claim_due(self, now: datetime, limit: int, lease_seconds: float) -> List[Row]:
+        """
+        Claim up to `limit` due pending messages, oldest first: count the
+        attempt and push next_attempt_at out by the lease, then commit. A
+        worker that dies mid-delivery leaves them to be retried once the
+        lease expires. FOR UPDATE SKIP LOCKED keeps concurrent workers from
+        claiming the same rows.
+        """
+        try:
+            rows = self.db.execute(
+                select(
+                    NotificationOutbox.id,
+                    NotificationOutbox.channel,
+                    NotificationOutbox.recipient,
+                    NotificationOutbox.subject,
+                    NotificationOutbox.body,
+                    (NotificationOutbox.attempts + 1).label("attempts"),
+                )
+                .where(
+                    NotificationOutbox.status == "pending",
+                    NotificationOutbox.next_attempt_at <= now,
+                )
+                .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if rows:
+                self.db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id.in_([r.id for r in rows]))
+                    .values(
+                        attempts=NotificationOutbox.attempts + 1,
+                        next_attempt_at=now + timedelta(seconds=lease_seconds),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return rows
+
+    def record_results(
+        self,
+        sent_ids: Sequence[int],
+        failures: Sequence[Dict[str, Any]],
+        now: datetime,
+    ) -> None:
+        """
+        One UPDATE for the delivered messages and one executemany for the
+        failed ones; each failure carries id, status ("pending" to retry at
+        next_attempt_at, or "dead"), next_attempt_at and error.
+        """
+        try:
+            if sent_ids:
+                self.db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id.in_(sent_ids))
+                    .values(status="sent", sent_at=now, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+            if failures:
+                table = NotificationOutbox.__table__
+                self.db.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("b_id"))
+                    .values(
+                        status=bindparam("b_status"),
+                        next_attempt_at=bindparam("b_next"),
+                        last_error=bindparam("b_error"),
+                    ),
+                    [
+                        {
+                            "b_id": f["id"],
+                            "b_status": f["status"],
+                            "b_next": f["next_attempt_at"],
+                            "b_error": f["error"],
+                        }
+                        for f in failures
+                    ],
+                )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(
+            self.db.execute(
+                select(NotificationOutbox.status, func.count()).group_by(
+                    NotificationOutbox.status
+                )
+            ).all()
+        )
+
+    def oldest_pending_at(self) -> Optional[datetime]:
+        return self.db.scalar(
+            select(func.min(NotificationOutbox.created_at)).where(
+                NotificationOutbox.status == "pending"
+            )
+        )
+
+    def list_dead(self, limit: int = 50) -> List[NotificationOutbox]:
+        return list(
+            self.db.scalars(
+                select(NotificationOutbox)
+                .where(NotificationOutbox.status == "dead")
+                .order_by(NotificationOutbox.id.desc())
+                .limit(limit)
+            )
+        )
+
+    def requeue_dead(self) -> int:
+        """Give every dead-lettered message a fresh set of attempts, due now."""
+        try:
+            result = self.db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.status == "dead")
+                .values(status="pending", attempts=0, next_attempt_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return result.rowcount
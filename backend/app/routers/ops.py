@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from ..db import async_engine, engine, get_db, pool_config
+from ..metrics import metrics_registry
+from ..repositories_db import OutboxRepositoryDB
+from ..schemas import DbPoolStatus, OutboxStatus
+from ..query_budget import query_budget
+
+router = APIRouter(tags=["ops"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-route latency, status and SQL metrics in Prometheus text format."""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _pool_stats(pool):
+    stats = getattr(pool, "stats", None)
+    return stats() if stats else None
+
+
+@router.get("/db/pool", response_model=DbPoolStatus)
+def db_pool():
+    """
+    Connection pool state for this worker process: checked-out / idle
+    connections, overflow in use, and checkout counts and wait times since
+    start, for the sync and async engines.
+    """
+    return DbPoolStatus(
+        config=pool_config(),
+        sync=_pool_stats(engine.pool),
+        async_=_pool_stats(async_engine.sync_engine.pool),
+    )
+
+
+@router.get("/outbox", response_model=OutboxStatus)
+@query_budget(3)
+def outbox_status(db: Session = Depends(get_db)):
+    """Notification outbox: messages by status, the oldest still pending,
+    and the most recent dead letters with their last error."""
+    repo = OutboxRepositoryDB(db)
+    return OutboxStatus(
+        counts=repo.status_counts(),
+        oldest_pending_at=repo.oldest_pending_at(),
+        dead=repo.list_dead(),
+    )
+
+
+@router.post("/outbox/requeue-dead")
+@query_budget(1)
+def outbox_requeue_dead(db: Session = Depends(get_db)):
+    """Retry every dead-lettered message from scratch."""
+    return {"requeued": OutboxRepositoryDB(db).requeue_dead()}
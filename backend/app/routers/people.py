@@ -1,11 +1,19 @@
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
-from ..repositories_db import PeopleRepositoryDB
+from ..db import get_async_db, get_db
+from ..export_cache import export_cache
+from ..exports import EXPORT_MEDIA_TYPES, iter_person_ics
+from ..http_cache import etag_matches, not_modified, person_feed_etag
+from ..pagination import parse_fields, set_next_cursor
+from ..repositories_db import PERSON_FIELDS, PeopleRepositoryDB, SchedulesRepositoryDB
+from ..repositories_async import PeopleRepositoryAsync
 from sqlalchemy.exc import IntegrityError
-from ..schemas import PersonCreate, PersonRead, PersonUsage
+from ..schemas import PersonCreate, PersonPartialRead, PersonRead, PersonUsage
+from ..query_budget import query_budget
 
 
 
@@ -16,15 +24,33 @@ def create_person(data: PersonCreate, db: Session = Depends(get_db)):
     repo = PeopleRepositoryDB(db)
     return repo.create(data)
 
-@router.get("/", response_model=List[PersonRead])
-def list_people(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[PersonPartialRead], response_model_exclude_unset=True)
+@query_budget(1)
+def list_people(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, ge=0),
+    q: Optional[str] = Query(None, min_length=1),
+    team_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+    db: Session = Depends(get_db),
+):
+    """
+    List people ordered by id. Page with ?limit=N and pass the
+    X-Next-Cursor header back as ?after_id=. ?fields=id,name returns only
+    those fields (id is always included).
+    """
+    selected = parse_fields(fields, PERSON_FIELDS)
     repo = PeopleRepositoryDB(db)
-    return repo.list()
+    rows = repo.list(limit=limit, after_id=after_id, q=q, team_id=team_id, fields=selected)
+    set_next_cursor(response, rows, limit, rows[-1]["id"] if rows else None)
+    return rows
 
 @router.get("/{person_id}", response_model=PersonRead)
-def get_person(person_id: int, db: Session = Depends(get_db)):
-    repo = PeopleRepositoryDB(db)
-    obj = repo.get(person_id)
+@query_budget(1)
+async def get_person(person_id: int, db: AsyncSession = Depends(get_async_db)):
+    repo = PeopleRepositoryAsync(db)
+    obj = await repo.get(person_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Person not found")
     return PersonRead.model_validate(obj)
@@ -44,6 +70,43 @@ def get_person_usage(person_id: int, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/{person_id}/calendar.ics")
+@query_budget(3)
+def get_person_calendar(
+    person_id: int,
+    request: Request,
+    days: int = Query(90, ge=1, le=366, description="How many days ahead to include"),
+    db: Session = Depends(get_db),
+):
+    """
+    iCalendar subscription feed of the person's primary and secondary
+    shifts across all their teams' current schedules, from today through
+    today + days. Revalidate with If-None-Match: unchanged feeds get a 304
+    after a single lookup of the underlying schedule versions.
+    """
+    person = PeopleRepositoryDB(db).get(person_id)
+    if not person:
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    start = date.today()
+    end = start + timedelta(days=days)
+    sched_repo = SchedulesRepositoryDB(db)
+    etag = person_feed_etag(
+        person_id, sched_repo.person_feed_versions(person_id, start, end), start, days
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    headers = {"ETag": etag}
+    cache_key = (("person", person_id), "ics", etag)
+    body = export_cache.get(cache_key)
+    if body is None:
+        rows = sched_repo.person_feed_rows(person_id, start, end)
+        body = "".join(iter_person_ics(person_id, person.name, rows)).encode("utf-8")
+        export_cache.put(cache_key, body)
+    return Response(content=body, media_type=EXPORT_MEDIA_TYPES["ics"], headers=headers)
+
+
 @router.delete("/{person_id}", status_code=204)
 def delete_person(person_id: int, db: Session = Depends(get_db)):
     repo = PeopleRepositoryDB(db)
@@ -1,10 +1,11 @@
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from sqlalchemy.orm import Session
 from ..db import get_db
-from ..repositories_db import PTORepositoryDB
-from ..schemas import PTOCreate, PTORead
+from ..repositories_db import PTORepositoryDB, SchedulesRepositoryDB
+from ..schemas import PTOCreate, PTORead, PTOReplanResult
+from ..query_budget import query_budget
 
 router = APIRouter(prefix="/pto", tags=["pto"])
 
@@ -12,3 +13,33 @@ router = APIRouter(prefix="/pto", tags=["pto"])
 def create_pto(data: PTOCreate, db: Session = Depends(get_db)):
     repo = PTORepositoryDB(db)
     return repo.create(data)
+
+
+def _replan(db: Session, pto: PTORead) -> PTOReplanResult:
+    changes, unresolved = SchedulesRepositoryDB(db).replan_for_pto(
+        pto.person_id, pto.start_date, pto.end_date
+    )
+    return PTOReplanResult(pto=pto, changes=changes, unresolved=unresolved)
+
+
+@router.post("/replan", response_model=PTOReplanResult)
+@query_budget(8)
+def create_pto_and_replan(data: PTOCreate, db: Session = Depends(get_db)):
+    """
+    Create PTO, then reassign only the existing slots it conflicts with
+    (manual overrides are kept). Returns the slot-level diff.
+    """
+    if data.end_date < data.start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    pto = PTORepositoryDB(db).create(data)
+    return _replan(db, pto)
+
+
+@router.post("/{pto_id}/replan", response_model=PTOReplanResult)
+@query_budget(7)
+def replan_pto(pto_id: int, db: Session = Depends(get_db)):
+    """Re-run conflict re-planning for an existing PTO entry."""
+    pto = PTORepositoryDB(db).get(pto_id)
+    if not pto:
+        raise HTTPException(status_code=404, detail="PTO not found")
+    return _replan(db, pto)
@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import date
-import csv
-from io import StringIO
 
 from pydantic import BaseModel
 from typing import Literal
 
-from ..db import get_db
-from ..repositories_db import SchedulesRepositoryDB, PTORepositoryDB, TeamsRepositoryDB
+from ..db import get_async_db, get_db
+from ..exports import EXPORT_MEDIA_TYPES, export_headers, stream_export
+from ..export_cache import export_cache
+from ..http_cache import etag_matches, not_modified, schedule_etag
+from ..repositories_db import (
+    SchedulesRepositoryDB,
+    PTORepositoryDB,
+    TeamsRepositoryDB,
+    SlotConflictError,
+)
+from ..repositories_async import SchedulesRepositoryAsync
 from ..models_db import ScheduleDefinition, OnCallSlot, Person
 from ..schemas import (
     ScheduleDefinitionCreate,
@@ -17,17 +27,67 @@ from ..schemas import (
     ScheduleRead,
     OnCallSlotRead,
     OverrideRequest,
+    BatchOverrideRequest,
+    SwapSlotsRequest,
+    RotateSlotsRequest,
+    ExchangePeopleRequest,
+    SlotUpdateResult,
     SchedulePersonUsage, 
     BulkReassignRequest,
     PersonUsage,
+    BulkGenerateRequest,
+    BulkGenerateResult,
+    ExportCacheStats,
 )
-from ..scheduler import first_week_start_of_year
+from ..scheduler import first_week_start_of_year, generate_many
+from ..query_budget import query_budget
 
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
 
 
+class SlotWindow:
+    """
+    Optional ?from=&to= (dates) and ?slot_from=&slot_to= (slot numbers)
+    filters for schedule reads. Slots overlapping the date range are
+    returned; all bounds are inclusive.
+    """
+
+    def __init__(
+        self,
+        start: Optional[date] = Query(None, alias="from"),
+        end: Optional[date] = Query(None, alias="to"),
+        slot_from: Optional[int] = Query(None, ge=1),
+        slot_to: Optional[int] = Query(None, ge=1),
+    ):
+        if start and end and start > end:
+            raise HTTPException(status_code=400, detail="'from' must be on or before 'to'")
+        if slot_from and slot_to and slot_from > slot_to:
+            raise HTTPException(status_code=400, detail="slot_from must be <= slot_to")
+        self.start = start
+        self.end = end
+        self.slot_from = slot_from
+        self.slot_to = slot_to
+
+    def etag_variant(self) -> List[Optional[str]]:
+        return [
+            f"from{self.start.isoformat()}" if self.start else None,
+            f"to{self.end.isoformat()}" if self.end else None,
+            f"sf{self.slot_from}" if self.slot_from else None,
+            f"st{self.slot_to}" if self.slot_to else None,
+        ]
+
+    def kwargs(self) -> dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "slot_from": self.slot_from,
+            "slot_to": self.slot_to,
+        }
+
+
 @router.post("/teams/{team_id}/generate", response_model=ScheduleRead)
+@query_budget(8)
 def generate_schedule_for_team(
     team_id: int,
     data: ScheduleDefinitionCreate,
@@ -52,15 +112,21 @@ def generate_schedule_for_team(
     pto_by_person = pto_repo.list_for_team_year(team_id, data.year)
 
     sched_repo = SchedulesRepositoryDB(db)
-    schedule_id = sched_repo.create_schedule(
-        team_id=team_id,
-        year=data.year,
-        rotation_days=data.rotation_days,
-        week_starts_on=data.week_starts_on,
-        custom_start_date=data.custom_start_date,
-        person_ids=person_ids,
-        pto_by_person=pto_by_person,
-    )
+    try:
+        schedule_id = sched_repo.create_schedule(
+            team_id=team_id,
+            year=data.year,
+            rotation_days=data.rotation_days,
+            week_starts_on=data.week_starts_on,
+            custom_start_date=data.custom_start_date,
+            person_ids=person_ids,
+            pto_by_person=pto_by_person,
+            engine=data.engine,
+            weights=data.weights,
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
 
     schedule = sched_repo.get_schedule(schedule_id)
     slots = sched_repo.get_slots(schedule_id)
@@ -72,13 +138,116 @@ def generate_schedule_for_team(
     )
 
 
-@router.get("/{schedule_id}", response_model=ScheduleRead)
-def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
+@router.post("/bulk-generate", response_model=List[BulkGenerateResult])
+@query_budget(11)
+def bulk_generate_schedules(
+    data: BulkGenerateRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Generate schedules for many (team, year) pairs in one request.
+
+    Membership and PTO are fetched for all items up front, generation runs
+    on the shared process pool, and schedules are persisted in batched
+    commits (savepoint, definitions, slots, release per batch of 50). Each
+    item gets its own result; one failing item does not fail the rest.
+    """
+    items = data.items
+    results: List[BulkGenerateResult] = [
+        BulkGenerateResult(team_id=item.team_id, year=item.year, status="error")
+        for item in items
+    ]
+
+    teams_repo = TeamsRepositoryDB(db)
+    members_by_team = teams_repo.member_ids_for_teams(
+        list({item.team_id for item in items})
+    )
+
+    pto_repo = PTORepositoryDB(db)
+    pto_by_key = pto_repo.list_for_teams_years(
+        list({(item.team_id, item.year) for item in items if item.team_id in members_by_team})
+    )
+
+    jobs = []
+    job_indexes: List[int] = []
+    for idx, item in enumerate(items):
+        if item.team_id not in members_by_team:
+            results[idx].error = "Team not found"
+            continue
+        person_ids = item.person_ids or members_by_team[item.team_id]
+        if not person_ids:
+            results[idx].error = "Team has no members and no person_ids supplied"
+            continue
+        jobs.append(
+            {
+                "engine": item.engine,
+                "weights": item.weights,
+                "people_ids": person_ids,
+                "year": item.year,
+                "rotation_days": item.rotation_days,
+                "week_starts_on": item.week_starts_on,
+                "custom_start_date": item.custom_start_date,
+                "pto_by_person": pto_by_key.get((item.team_id, item.year), {}),
+                "assign_secondary": True,
+            }
+        )
+        job_indexes.append(idx)
+
+    entries = []
+    entry_indexes: List[int] = []
+    for idx, (slots, error) in zip(job_indexes, generate_many(jobs)):
+        if error is not None:
+            results[idx].error = error
+            continue
+        item = items[idx]
+        entries.append(
+            {
+                "team_id": item.team_id,
+                "year": item.year,
+                "rotation_days": item.rotation_days,
+                "week_starts_on": item.week_starts_on,
+                "custom_start_date": item.custom_start_date,
+                "slots": slots,
+            }
+        )
+        entry_indexes.append(idx)
+
     sched_repo = SchedulesRepositoryDB(db)
-    schedule = sched_repo.get_schedule(schedule_id)
+    persisted = sched_repo.create_schedules_bulk(entries)
+    for idx, entry, (schedule_id, error) in zip(entry_indexes, entries, persisted):
+        if schedule_id is None:
+            results[idx].error = f"Failed to persist schedule: {error}"
+            continue
+        results[idx].status = "created"
+        results[idx].schedule_id = schedule_id
+        results[idx].slot_count = len(entry["slots"])
+
+    return results
+
+
+@router.get("/export-cache/stats", response_model=ExportCacheStats)
+def get_export_cache_stats():
+    return export_cache.stats()
+
+
+@router.get("/{schedule_id}", response_model=ScheduleRead)
+@query_budget(2)
+async def get_schedule(
+    schedule_id: int,
+    request: Request,
+    response: Response,
+    window: SlotWindow = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    sched_repo = SchedulesRepositoryAsync(db)
+    schedule = await sched_repo.get_schedule(schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
-    slots = sched_repo.get_slots(schedule_id)
+    etag = schedule_etag(schedule, *window.etag_variant())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    slots = await sched_repo.get_slots(schedule_id, **window.kwargs())
     return ScheduleRead(
         schedule=ScheduleDefinitionRead.model_validate(schedule),
         slots=[OnCallSlotRead.model_validate(s) for s in slots],
@@ -86,6 +255,7 @@ def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{schedule_id}/override", response_model=OnCallSlotRead)
+@query_budget(5)
 def override_slot(
     schedule_id: int,
     override: OverrideRequest,
@@ -114,11 +284,118 @@ def override_slot(
     return OnCallSlotRead.model_validate(slot)
 
 
-@router.get("/{schedule_id}/oncall-now", response_model=OnCallSlotRead)
-def get_oncall_now(schedule_id: int, db: Session = Depends(get_db)):
+@router.post("/{schedule_id}/overrides", response_model=List[OnCallSlotRead])
+@query_budget(7)
+def override_slots(
+    schedule_id: int,
+    body: BatchOverrideRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Apply many slot overrides atomically: either every override is applied
+    in one transaction or none is. Returns the updated slots.
+    """
     sched_repo = SchedulesRepositoryDB(db)
+    try:
+        slots = sched_repo.apply_overrides(schedule_id, body.overrides)
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+    return [OnCallSlotRead.model_validate(s) for s in slots]
+
+
+def _slot_update_result(sched_repo: SchedulesRepositoryDB, schedule_id: int, updated: int):
+    schedule = sched_repo.get_schedule(schedule_id)
+    return SlotUpdateResult(
+        schedule_id=schedule_id, version=schedule.version, updated_slots=updated
+    )
 
-    result = sched_repo.get_oncall_now_for_schedule(schedule_id)
+
+@router.post("/{schedule_id}/swap", response_model=SlotUpdateResult)
+@query_budget(6)
+def swap_slots(
+    schedule_id: int,
+    body: SwapSlotsRequest,
+    db: Session = Depends(get_db),
+):
+    """Exchange the assignments of two slots in one statement."""
+    sched_repo = SchedulesRepositoryDB(db)
+    if not sched_repo.get_schedule(schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    try:
+        updated = sched_repo.swap_slots(schedule_id, body.slot_a, body.slot_b, body.scope)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Slot not found")
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _slot_update_result(sched_repo, schedule_id, updated)
+
+
+@router.post("/{schedule_id}/rotate", response_model=SlotUpdateResult)
+@query_budget(5)
+def rotate_slots(
+    schedule_id: int,
+    body: RotateSlotsRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Shift assignments forward by `offset` slots over a slot range, wrapping
+    around, in one statement.
+    """
+    if body.to_slot is not None and body.to_slot < body.from_slot:
+        raise HTTPException(status_code=400, detail="to_slot must be >= from_slot")
+    sched_repo = SchedulesRepositoryDB(db)
+    if not sched_repo.get_schedule(schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    try:
+        updated = sched_repo.rotate_slots(
+            schedule_id, body.from_slot, body.to_slot, body.offset, body.scope
+        )
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _slot_update_result(sched_repo, schedule_id, updated)
+
+
+@router.post("/{schedule_id}/exchange-people", response_model=SlotUpdateResult)
+@query_budget(6)
+def exchange_people(
+    schedule_id: int,
+    body: ExchangePeopleRequest,
+    db: Session = Depends(get_db),
+):
+    """Swap two people everywhere they appear within a slot range."""
+    sched_repo = SchedulesRepositoryDB(db)
+    if not sched_repo.get_schedule(schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    found = set(
+        db.scalars(select(Person.id).where(Person.id.in_([body.person_a_id, body.person_b_id])))
+    )
+    if {body.person_a_id, body.person_b_id} - found:
+        raise HTTPException(status_code=400, detail="Person not found")
+    try:
+        updated = sched_repo.exchange_people(
+            schedule_id,
+            body.person_a_id,
+            body.person_b_id,
+            body.from_slot,
+            body.to_slot,
+            body.scope,
+        )
+    except SlotConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _slot_update_result(sched_repo, schedule_id, updated)
+
+
+@router.get("/{schedule_id}/oncall-now", response_model=OnCallSlotRead)
+@query_budget(3)
+async def get_oncall_now(schedule_id: int, db: AsyncSession = Depends(get_async_db)):
+    sched_repo = SchedulesRepositoryAsync(db)
+
+    result = await sched_repo.get_oncall_now_for_schedule(schedule_id)
     if not result:
         raise HTTPException(
             status_code=404,
@@ -126,12 +403,14 @@ def get_oncall_now(schedule_id: int, db: Session = Depends(get_db)):
         )
 
     _sched, slot, _primary, _secondary = result
-    return OnCallSlotRead.model_validate(slot)
+    return slot
 
 
 @router.get("/{schedule_id}/export")
+@query_budget(2)
 def export_schedule(
     schedule_id: int,
+    request: Request,
     format: str = Query("csv", pattern="^(csv|md|ics)$"),
     db: Session = Depends(get_db),
 ):
@@ -139,141 +418,55 @@ def export_schedule(
     schedule = sched_repo.get_schedule(schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
-
-    # enriched slots: adds primary_name, primary_email, secondary_name, secondary_email
-    slots = sched_repo.get_slots_with_people(schedule_id)
-
-    # CSV export
-    if format == "csv":
-        buf = StringIO()
-        writer = csv.writer(buf)
-        # include IDs + names + emails
-        writer.writerow(
-            [
-                "slot",
-                "start",
-                "end",
-                "primary_person_id",
-                "primary_name",
-                "primary_email",
-                "secondary_person_id",
-                "secondary_name",
-                "secondary_email",
-                "notes",
-            ]
-        )
-        for s in slots:
-            writer.writerow(
-                [
-                    s.slot,
-                    s.start.isoformat(),
-                    s.end.isoformat(),
-                    s.primary_person_id,
-                    getattr(s, "primary_name", "") or "",
-                    getattr(s, "primary_email", "") or "",
-                    s.secondary_person_id or "",
-                    getattr(s, "secondary_name", "") or "",
-                    getattr(s, "secondary_email", "") or "",
-                    s.notes or "",
-                ]
-            )
-        return Response(
-            content=buf.getvalue(),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=schedule_{schedule_id}.csv"
-            },
-        )
-
-    # Markdown export
-    if format == "md":
-        lines = [
-            f"# Schedule {schedule_id}",
-            "",
-            "| Slot | Start | End | Primary | Secondary | Notes |",
-            "|------|-------|-----|---------|-----------|-------|",
-        ]
-        for s in slots:
-            primary_label = getattr(s, "primary_name", None) or f"#{s.primary_person_id}"
-            if getattr(s, "primary_email", None):
-                primary_label = f"{primary_label} <{s.primary_email}>"
-
-            if s.secondary_person_id:
-                secondary_label = (
-                    getattr(s, "secondary_name", None) or f"#{s.secondary_person_id}"
-                )
-                if getattr(s, "secondary_email", None):
-                    secondary_label = f"{secondary_label} <{s.secondary_email}>"
-            else:
-                secondary_label = ""
-
-            lines.append(
-                f"| {s.slot} | {s.start.isoformat()} | {s.end.isoformat()} | "
-                f"{primary_label} | {secondary_label} | {s.notes or ''} |"
-            )
-        md = "\n".join(lines)
-        return Response(content=md, media_type="text/markdown")
-
-    # ICS export
-    if format == "ics":
-        # basic all-day events
-        def fmt(d: date) -> str:
-            return d.strftime("%Y%m%d")
-
-        lines = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//OnCallScheduler//EN",
-        ]
-        for s in slots:
-            uid = f"{schedule_id}-{s.slot}@oncall"
-            dtstart = fmt(s.start)
-            dtend = fmt(s.end + date.resolution)  # exclusive end
-            primary_label = getattr(s, "primary_name", None) or f"#{s.primary_person_id}"
-            summary = f"On-call slot {s.slot} (primary {primary_label})"
-            lines.extend(
-                [
-                    "BEGIN:VEVENT",
-                    f"UID:{uid}",
-                    f"DTSTART;VALUE=DATE:{dtstart}",
-                    f"DTEND;VALUE=DATE:{dtend}",
-                    f"SUMMARY:{summary}",
-                    "END:VEVENT",
-                ]
-            )
-        lines.append("END:VCALENDAR")
-        ics = "\n".join(lines)
+    etag = schedule_etag(schedule, format)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    headers = {**export_headers(schedule_id, format), "ETag": etag}
+    cache_key = (schedule_id, format, schedule.version)
+    body = export_cache.get(cache_key)
+    if body is not None:
         return Response(
-            content=ics,
-            media_type="text/calendar",
-            headers={
-                "Content-Disposition": f"attachment; filename=schedule_{schedule_id}.ics"
-            },
+            content=body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers
         )
 
-    # Should be unreachable because of the Query pattern, but just in case:
-    raise HTTPException(status_code=400, detail="Unsupported format")
+    # rows are streamed from a joined query (slot + primary/secondary
+    # name/email) and rendered in chunks; see exports.py. The rendered
+    # body is kept for the next request of the same version.
+    return StreamingResponse(
+        export_cache.tee(cache_key, stream_export(schedule_id, format)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers,
+    )
 
 
 @router.get("/teams/{team_id}", response_model=ScheduleRead)
-def get_schedule_for_team(
+@query_budget(2)
+async def get_schedule_for_team(
     team_id: int,
+    request: Request,
+    response: Response,
     year: int = Query(..., ge=2000, le=2100),
-    db: Session = Depends(get_db),
+    window: SlotWindow = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Fetch the latest schedule for a given team + year.
-    Example: /schedules/teams/2?year=2026
+    Example: /schedules/teams/2?year=2026&from=2026-03-01&to=2026-03-31
     """
-    sched_repo = SchedulesRepositoryDB(db)
-    schedule = sched_repo.get_schedule_for_team_year(team_id, year)
+    sched_repo = SchedulesRepositoryAsync(db)
+    schedule = await sched_repo.get_schedule_for_team_year(team_id, year)
     if not schedule:
         raise HTTPException(
             status_code=404,
             detail="No schedule found for that team/year",
         )
+    etag = schedule_etag(schedule, *window.etag_variant())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
 
-    slots = sched_repo.get_slots(schedule.id)
+    slots = await sched_repo.get_slots(schedule.id, **window.kwargs())
     return ScheduleRead(
         schedule=ScheduleDefinitionRead.model_validate(schedule),
         slots=[OnCallSlotRead.model_validate(s) for s in slots],
@@ -1,14 +1,18 @@
 
 from sqlite3 import IntegrityError
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
-from ..db import get_db
+from ..db import get_async_db, get_db
 from ..repositories_db import TeamsRepositoryDB
 from ..models_db import Team, ScheduleDefinition, OnCallSlot, Person
-from ..schemas import TeamCreate, TeamRead, TeamMembershipUpdate, OnCallNowResponse, OnCallSlotRead, PersonRead
-from ..repositories_db import TeamsRepositoryDB, SchedulesRepositoryDB
+from ..schemas import TeamCreate, TeamPartialRead, TeamRead, TeamMembershipUpdate, OnCallNowResponse, OnCallSlotRead, PersonRead
+from ..pagination import parse_fields, set_next_cursor
+from ..repositories_db import TEAM_FIELDS, TeamsRepositoryDB, SchedulesRepositoryDB
+from ..repositories_async import SchedulesRepositoryAsync, TeamsRepositoryAsync
+from ..query_budget import query_budget
 
 
 router = APIRouter(prefix="/teams", tags=["teams"])
@@ -18,12 +22,56 @@ def create_team(data: TeamCreate, db: Session = Depends(get_db)):
     repo = TeamsRepositoryDB(db)
     return repo.create(data)
 
-@router.get("/", response_model=List[TeamRead])
-def list_teams(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[TeamPartialRead], response_model_exclude_unset=True)
+@query_budget(2)
+def list_teams(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, ge=0),
+    q: Optional[str] = Query(None, min_length=1),
+    member_id: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+    db: Session = Depends(get_db),
+):
+    """
+    List teams ordered by id, with member ids loaded for the whole page in
+    one query. Page with ?limit=N and pass the X-Next-Cursor header back as
+    ?after_id=. ?fields=id,name returns only those fields (id is always
+    included; leaving out member_ids skips the membership query).
+    """
+    selected = parse_fields(fields, TEAM_FIELDS)
     repo = TeamsRepositoryDB(db)
-    return repo.list()
+    rows = repo.list(limit=limit, after_id=after_id, q=q, member_id=member_id, fields=selected)
+    set_next_cursor(response, rows, limit, rows[-1]["id"] if rows else None)
+    return rows
+
+@router.get("/oncall-now", response_model=List[OnCallNowResponse])
+@query_budget(1)
+async def list_teams_oncall_now(
+    team_ids: Optional[List[int]] = Query(None),
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Who is on call right now for every team (or only ?team_ids=...), in one
+    round trip and a constant number of queries. Teams without an active
+    slot today are omitted.
+    """
+    sched_repo = SchedulesRepositoryAsync(db)
+    rows = await sched_repo.get_oncall_now_for_teams(team_ids=team_ids, year=year)
+    return [
+        OnCallNowResponse(
+            schedule_id=schedule_id,
+            team_id=team_id,
+            slot=OnCallSlotRead.model_validate(slot),
+            primary_person=PersonRead.model_validate(primary),
+            secondary_person=PersonRead.model_validate(secondary) if secondary else None,
+        )
+        for schedule_id, team_id, slot, primary, secondary in rows
+    ]
 
 @router.get("/{team_id}", response_model=TeamRead)
+@query_budget(2)
 def get_team(team_id: int, db: Session = Depends(get_db)):
     repo = TeamsRepositoryDB(db)
     team = repo.get(team_id)
@@ -38,6 +86,7 @@ def get_team(team_id: int, db: Session = Depends(get_db)):
     )
 
 @router.put("/{team_id}/members", response_model=TeamRead)
+@query_budget(5)
 def update_team_members(
     team_id: int,
     update: TeamMembershipUpdate,
@@ -47,15 +96,16 @@ def update_team_members(
     return repo.update_members(team_id, update.member_ids)
 
 @router.get("/{team_id}/oncall-now", response_model=OnCallNowResponse)
-def get_team_oncall_now(team_id: int, db: Session = Depends(get_db)):
-    # still validate that the team exists
-    team = db.get(Team, team_id)
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-
-    sched_repo = SchedulesRepositoryDB(db)
-    result = sched_repo.get_oncall_now_for_team(team_id)
+@query_budget(3)
+async def get_team_oncall_now(team_id: int, db: AsyncSession = Depends(get_async_db)):
+    sched_repo = SchedulesRepositoryAsync(db)
+    result = await sched_repo.get_oncall_now_for_team(team_id)
     if not result:
+        # still validate that the team exists (only on the miss path, so
+        # cached lookups never touch the database)
+        team = await TeamsRepositoryAsync(db).get(team_id)
+        if not team:
+            raise HTTPException(status_code=404, detail="Team not found")
         raise HTTPException(
             status_code=404,
             detail=f"No active on-call slot for today in current schedule for team {team_id}",
@@ -66,14 +116,15 @@ def get_team_oncall_now(team_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Primary person not found")
 
     return OnCallNowResponse(
-        schedule_id=sched.id,
+        schedule_id=sched.schedule_id,
         team_id=team_id,
-        slot=OnCallSlotRead.model_validate(slot),
-        primary_person=PersonRead.model_validate(primary),
-        secondary_person=PersonRead.model_validate(secondary) if secondary else None,
+        slot=slot,
+        primary_person=primary,
+        secondary_person=secondary,
     )
 
 @router.delete("/{team_id}", status_code=204)
+@query_budget(8)
 def delete_team(team_id: int, db: Session = Depends(get_db)):
     """
     Delete a team. If it still has schedules or other references,
@@ -1,6 +1,16 @@
 
+import heapq
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date, timedelta
-from typing import List, Dict, Any, Optional, Set
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+# Per-person PTO as sorted, non-overlapping, inclusive (start, end) intervals.
+PTOInterval = Tuple[date, date]
+PTOByPerson = Dict[int, List[PTOInterval]]
 
 def first_week_start_of_year(year: int, week_starts_on: int = 0) -> date:
     d = date(year, 1, 1)
@@ -8,13 +18,28 @@ def first_week_start_of_year(year: int, week_starts_on: int = 0) -> date:
         d += timedelta(days=1)
     return d
 
-def overlaps_pto(slot_start: date, slot_end: date, pto_dates: Set[date]) -> bool:
-    d = slot_start
-    while d <= slot_end:
-        if d in pto_dates:
-            return True
-        d += timedelta(days=1)
-    return False
+def merge_pto_intervals(intervals: Iterable[PTOInterval]) -> List[PTOInterval]:
+    """
+    Sort and merge inclusive (start, end) date ranges. Ranges that overlap or
+    touch (end + 1 day == next start) collapse into one.
+    """
+    merged: List[PTOInterval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def overlaps_pto(slot_start: date, slot_end: date, intervals: List[PTOInterval]) -> bool:
+    """
+    True if [slot_start, slot_end] intersects any of the merged intervals.
+    Binary search for the last interval starting on/before slot_end; since
+    the intervals are disjoint and sorted, it is the only candidate.
+    """
+    idx = bisect_right(intervals, slot_end, key=lambda iv: iv[0])
+    return idx > 0 and intervals[idx - 1][1] >= slot_start
 
 def generate_oncall_slots(
     people_ids: List[int],
@@ -22,10 +47,12 @@ def generate_oncall_slots(
     rotation_days: int = 7,
     week_starts_on: int = 0,
     custom_start_date: Optional[date] = None,
-    pto_by_person: Optional[Dict[int, Set[date]]] = None,
+    pto_by_person: Optional[PTOByPerson] = None,
     assign_secondary: bool = True,
 ) -> List[Dict[str, Any]]:
     """
+    pto_by_person maps person_id -> merged intervals (see merge_pto_intervals).
+
     Returns list of slots:
       {
         "slot": int,
@@ -63,7 +90,7 @@ def generate_oncall_slots(
         for offset in range(n):
             candidate_idx = (base_index + offset) % n
             pid = people_ids[candidate_idx]
-            if not overlaps_pto(current_start, current_end, pto_by_person.get(pid, set())):
+            if not overlaps_pto(current_start, current_end, pto_by_person.get(pid, ())):
                 chosen_primary = pid
                 primary_idx = candidate_idx
                 break
@@ -98,3 +125,364 @@ def generate_oncall_slots(
     return slots
 
 
+# Cap on the slots x people cells materialised at once by the vectorized
+# generator; larger inputs are processed in row chunks.
+VECTOR_CHUNK_CELLS = int(os.getenv("SCHEDULER_VECTOR_CHUNK_CELLS", "4000000"))
+
+
+def generate_oncall_slots_vectorized(
+    people_ids: List[int],
+    year: int,
+    rotation_days: int = 7,
+    week_starts_on: int = 0,
+    custom_start_date: Optional[date] = None,
+    pto_by_person: Optional[PTOByPerson] = None,
+    assign_secondary: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    NumPy implementation of generate_oncall_slots with identical output.
+
+    Slot boundaries are day-number arrays (datetime64 for output) and PTO
+    becomes a slots x people availability matrix. Primaries are resolved
+    for all slots together, one rotation offset at a time; secondaries come
+    from a precomputed "next different person" table. Only the final list
+    of dicts is built in Python. Requires numpy (imported lazily).
+
+    Pays off when PTO forces long candidate scans (large pools, team-wide
+    blackouts): there the loop is O(n) per slot. With sparse PTO the loop
+    rarely scans past the nominal person and stays faster, so it remains
+    the default.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ValueError("The vectorized engine requires numpy")
+
+    if not people_ids:
+        raise ValueError("At least one person is required")
+    if rotation_days <= 0:
+        raise ValueError("rotation_days must be positive")
+
+    pto_by_person = pto_by_person or {}
+    start = custom_start_date or first_week_start_of_year(year, week_starts_on)
+    end_of_year = date(year, 12, 31)
+    if start > end_of_year:
+        return []
+
+    n = len(people_ids)
+    count = (end_of_year - start).days // rotation_days + 1
+    # Day numbers (date ordinals) for the arithmetic and searches; they are
+    # only turned into datetime64 / date for the output.
+    starts = start.toordinal() + np.arange(count, dtype=np.int64) * rotation_days
+    ends = np.minimum(starts + (rotation_days - 1), end_of_year.toordinal())
+
+    # busy[s, j]: people_ids[j] has PTO overlapping slot s. Each interval
+    # covers a contiguous run of slots, found with two searchsorted calls
+    # over all intervals at once and marked through a difference array.
+    columns_by_pid: Dict[int, List[int]] = {}
+    for j, pid in enumerate(people_ids):
+        columns_by_pid.setdefault(pid, []).append(j)
+    iv_cols: List[int] = []
+    iv_starts: List[int] = []
+    iv_ends: List[int] = []
+    for pid, cols in columns_by_pid.items():
+        for s, e in pto_by_person.get(pid, ()):
+            s_ord, e_ord = s.toordinal(), e.toordinal()
+            for j in cols:
+                iv_cols.append(j)
+                iv_starts.append(s_ord)
+                iv_ends.append(e_ord)
+    busy = np.zeros((count, n), dtype=bool)
+    if iv_cols:
+        cols_arr = np.asarray(iv_cols, dtype=np.int64)
+        first = np.searchsorted(ends, np.asarray(iv_starts, dtype=np.int64), side="left")
+        last = np.searchsorted(starts, np.asarray(iv_ends, dtype=np.int64), side="right")
+        keep = first < last
+        diff = np.zeros((count + 1, n), dtype=np.int32)
+        np.add.at(diff, (first[keep], cols_arr[keep]), 1)
+        np.add.at(diff, (last[keep], cols_arr[keep]), -1)
+        busy = np.cumsum(diff[:-1], axis=0) > 0
+
+    # Primary: first free person at or after the slot's nominal index. Most
+    # slots resolve within a few offsets, so step offsets over the shrinking
+    # set of unresolved rows, then finish any stragglers with one gather.
+    base = np.arange(count) % n
+    primary_idx = base.copy()
+    pending = np.arange(count)
+    offset = 0
+    while pending.size and offset < min(n, 8):
+        cand = (base[pending] + offset) % n
+        ok = ~busy[pending, cand]
+        primary_idx[pending[ok]] = cand[ok]
+        pending = pending[~ok]
+        offset += 1
+    if pending.size and offset < n:
+        offsets = np.arange(offset, n)
+        step = max(1, VECTOR_CHUNK_CELLS // n)
+        for lo in range(0, pending.size, step):
+            rows = pending[lo : lo + step]
+            rolled_cols = (base[rows, None] + offsets[None, :]) % n
+            free = ~busy[rows[:, None], rolled_cols]
+            found = free.any(axis=1)
+            # rows with nobody free keep the nominal person (base)
+            primary_idx[rows[found]] = (base[rows[found]] + offsets[free[found].argmax(axis=1)]) % n
+
+    pids = np.asarray(people_ids, dtype=np.int64)
+    primaries = pids[primary_idx].tolist()
+
+    if assign_secondary and n > 1:
+        if len(columns_by_pid) == n:
+            next_diff = (np.arange(n) + 1) % n
+        else:
+            # next_diff[j]: index of the next person after j (wrapping, at
+            # most n - 1 steps) whose id differs from people_ids[j], or -1
+            doubled = np.concatenate([pids, pids])
+            next_pos = np.empty(2 * n, dtype=np.int64)
+            next_pos[-1] = 2 * n
+            for k in range(2 * n - 2, -1, -1):
+                next_pos[k] = k + 1 if doubled[k + 1] != doubled[k] else next_pos[k + 1]
+            head = next_pos[:n]
+            next_diff = np.where(head - np.arange(n) <= n - 1, head % n, -1)
+        sec_idx = next_diff[primary_idx]
+        secondaries = [
+            pid if i >= 0 else None
+            for pid, i in zip(pids[np.maximum(sec_idx, 0)].tolist(), sec_idx.tolist())
+        ]
+    else:
+        secondaries = [None] * count
+
+    unix_epoch = date(1970, 1, 1).toordinal()
+    start_dates = (starts - unix_epoch).astype("datetime64[D]").tolist()
+    end_dates = (ends - unix_epoch).astype("datetime64[D]").tolist()
+    return [
+        {
+            "slot": i + 1,
+            "primary_person_id": p,
+            "secondary_person_id": s,
+            "start": a,
+            "end": b,
+        }
+        for i, (p, s, a, b) in enumerate(
+            zip(primaries, secondaries, start_dates, end_dates)
+        )
+    ]
+
+
+def iter_slot_ranges(
+    year: int,
+    rotation_days: int,
+    week_starts_on: int = 0,
+    custom_start_date: Optional[date] = None,
+) -> Iterator[Tuple[date, date]]:
+    """(start, end) of each slot, same boundaries as generate_oncall_slots."""
+    current_start = custom_start_date or first_week_start_of_year(year, week_starts_on)
+    end_of_year = date(year, 12, 31)
+    while current_start <= end_of_year:
+        current_end = min(current_start + timedelta(days=rotation_days - 1), end_of_year)
+        yield current_start, current_end
+        current_start = current_end + timedelta(days=1)
+
+
+def _pick_least_loaded(
+    heap: List[Tuple[float, int, int]],
+    loads: Dict[int, float],
+    weights: Dict[int, float],
+    days: int,
+    is_available: Callable[[int], bool],
+    exclude: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Pop the least-loaded available person from heap, charge them `days`
+    and push them back. Unavailable people that were popped on the way go
+    back unchanged. If nobody is available, the least-loaded non-excluded
+    person is used anyway (nobody to hand the slot to).
+    """
+    skipped: List[Tuple[float, int, int]] = []
+    chosen: Optional[Tuple[float, int, int]] = None
+    fallback: Optional[Tuple[float, int, int]] = None
+    while heap:
+        entry = heapq.heappop(heap)
+        pid = entry[2]
+        if pid == exclude:
+            skipped.append(entry)
+            continue
+        if is_available(pid):
+            chosen = entry
+            break
+        if fallback is None:
+            fallback = entry
+        skipped.append(entry)
+
+    if chosen is None and fallback is not None:
+        skipped.remove(fallback)
+        chosen = fallback
+    for entry in skipped:
+        heapq.heappush(heap, entry)
+    if chosen is None:
+        return None
+
+    _, order, pid = chosen
+    loads[pid] += days
+    heapq.heappush(heap, (loads[pid] / weights[pid], order, pid))
+    return pid
+
+
+def generate_balanced_slots(
+    people_ids: List[int],
+    year: int,
+    rotation_days: int = 7,
+    week_starts_on: int = 0,
+    custom_start_date: Optional[date] = None,
+    pto_by_person: Optional[PTOByPerson] = None,
+    assign_secondary: bool = True,
+    weights: Optional[Dict[int, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Load-balancing alternative to generate_oncall_slots.
+
+    Keeps a min-heap of accumulated primary load (days on call divided by
+    the person's weight, default 1.0) and another for secondary load. Each
+    slot goes to the least-loaded person not on PTO, so load skipped
+    because of PTO is made up later instead of drifting. Ties fall back to
+    people_ids order, which gives plain round-robin when there is no PTO.
+
+    O(log n) per slot plus one pop per person skipped for PTO. Same input
+    and output shape as generate_oncall_slots, plus `weights`.
+    """
+    people = list(dict.fromkeys(people_ids))
+    if not people:
+        raise ValueError("At least one person is required")
+    if rotation_days <= 0:
+        raise ValueError("rotation_days must be positive")
+
+    pto_by_person = pto_by_person or {}
+    w = {pid: 1.0 for pid in people}
+    for pid, weight in (weights or {}).items():
+        if pid in w:
+            if weight <= 0:
+                raise ValueError("weights must be positive")
+            w[pid] = float(weight)
+
+    n = len(people)
+    primary_load = {pid: 0.0 for pid in people}
+    secondary_load = {pid: 0.0 for pid in people}
+    primary_heap = [(0.0, idx, pid) for idx, pid in enumerate(people)]
+    # offset tie-break order by one so the first secondary is people[1]
+    secondary_heap = [(0.0, (idx - 1) % n, pid) for idx, pid in enumerate(people)]
+    heapq.heapify(secondary_heap)
+
+    slots: List[Dict[str, Any]] = []
+    for i, (current_start, current_end) in enumerate(
+        iter_slot_ranges(year, rotation_days, week_starts_on, custom_start_date)
+    ):
+        days = (current_end - current_start).days + 1
+
+        def available(pid: int) -> bool:
+            return not overlaps_pto(current_start, current_end, pto_by_person.get(pid, ()))
+
+        primary = _pick_least_loaded(primary_heap, primary_load, w, days, available)
+        secondary = None
+        if assign_secondary and n > 1:
+            secondary = _pick_least_loaded(
+                secondary_heap, secondary_load, w, days, available, exclude=primary
+            )
+
+        slots.append(
+            {
+                "slot": i + 1,
+                "primary_person_id": primary,
+                "secondary_person_id": secondary,
+                "start": current_start,
+                "end": current_end,
+            }
+        )
+    return slots
+
+
+GENERATION_ENGINES: Dict[str, Callable[..., List[Dict[str, Any]]]] = {
+    "round_robin": generate_oncall_slots,
+    "balanced": generate_balanced_slots,
+    "vectorized": generate_oncall_slots_vectorized,
+}
+
+
+def generate_slots(
+    engine: str = "round_robin",
+    weights: Optional[Dict[int, float]] = None,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """Dispatch to a generation engine by name; weights only apply to
+    engines that support them."""
+    try:
+        fn = GENERATION_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown generation engine: {engine}")
+    if engine == "balanced":
+        kwargs["weights"] = weights
+    return fn(**kwargs)
+
+
+# ----- Batch generation -----
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", str(os.cpu_count() or 1)))
+# Below this many jobs, shipping them to worker processes costs more than it saves.
+PARALLEL_MIN_JOBS = int(os.getenv("SCHEDULER_PARALLEL_MIN_JOBS", "4"))
+
+
+def _generate_job(kwargs: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """Run one generation job; errors are returned, not raised, so one bad
+    job does not abort the rest of a batch."""
+    try:
+        return generate_slots(**kwargs), None
+    except ValueError as e:
+        return None, str(e)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The shared generation pool, started on first use so processes that
+    never generate in parallel (and forked children) do not pay for it."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SCHEDULER_WORKERS)
+        return _pool
+
+
+def shutdown_generation_pool() -> None:
+    """Stop the shared pool's worker processes (app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def generate_many(
+    jobs: List[Dict[str, Any]],
+) -> List[Tuple[Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Run generate_slots for many independent jobs (each a kwargs dict).
+    Uses the shared process pool (SCHEDULER_WORKERS processes) when there is
+    enough work to amortise shipping the jobs to it.
+
+    Returns [(slots, error), ...] in the same order as jobs.
+    """
+    global _pool
+    if SCHEDULER_WORKERS <= 1 or len(jobs) < PARALLEL_MIN_JOBS:
+        return [_generate_job(j) for j in jobs]
+
+    chunksize = max(1, len(jobs) // (SCHEDULER_WORKERS * 4))
+    pool = _get_pool()
+    try:
+        return list(pool.map(_generate_job, jobs, chunksize=chunksize))
+    except BrokenProcessPool:
+        # a worker died (e.g. OOM-killed); start a fresh pool next time
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
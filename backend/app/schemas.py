@@ -1,7 +1,7 @@
 
 from datetime import date, datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 
 
 # ----- Person -----
@@ -19,6 +19,13 @@ class PersonRead(BaseModel):
     class Config:
         from_attributes = True
 
+class PersonPartialRead(BaseModel):
+    """A GET /people/ row: only id and the ?fields= asked for are present."""
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    time_zone: Optional[str] = None
+
 # ----- Team -----
 class TeamCreate(BaseModel):
     name: str
@@ -33,6 +40,13 @@ class TeamRead(BaseModel):
     class Config:
         from_attributes = True
 
+class TeamPartialRead(BaseModel):
+    """A GET /teams/ row: only id and the ?fields= asked for are present."""
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    member_ids: Optional[List[int]] = None
+
 class TeamMembershipUpdate(BaseModel):
     member_ids: List[int]
 
@@ -53,6 +67,22 @@ class PTORead(BaseModel):
     class Config:
         from_attributes = True
 
+class PTOReplanChange(BaseModel):
+    schedule_id: int
+    team_id: int
+    slot: int
+    start: date
+    end: date
+    role: Literal["primary", "secondary"]
+    old_person_id: int
+    # None: secondary cleared (changes) / no replacement found (unresolved)
+    new_person_id: Optional[int] = None
+
+class PTOReplanResult(BaseModel):
+    pto: PTORead
+    changes: List[PTOReplanChange]
+    unresolved: List[PTOReplanChange]
+
 # ----- Schedule -----
 class ScheduleDefinitionCreate(BaseModel):
     year: int
@@ -60,6 +90,26 @@ class ScheduleDefinitionCreate(BaseModel):
     week_starts_on: int = 0
     custom_start_date: Optional[date] = None
     person_ids: Optional[List[int]] = None
+    # "balanced" assigns each slot to the least-loaded available person;
+    # weights (person_id -> relative share, default 1.0) only apply to it.
+    # "vectorized" is round_robin computed with numpy (same output).
+    engine: Literal["round_robin", "balanced", "vectorized"] = "round_robin"
+    weights: Optional[Dict[int, float]] = None
+
+class BulkGenerateItem(ScheduleDefinitionCreate):
+    team_id: int
+
+class BulkGenerateRequest(BaseModel):
+    # at most two create_schedules_bulk batches per request
+    items: List[BulkGenerateItem] = Field(..., min_length=1, max_length=100)
+
+class BulkGenerateResult(BaseModel):
+    team_id: int
+    year: int
+    status: Literal["created", "error"]
+    schedule_id: Optional[int] = None
+    slot_count: int = 0
+    error: Optional[str] = None
 
 class ScheduleDefinitionRead(BaseModel):
     id: int
@@ -69,6 +119,7 @@ class ScheduleDefinitionRead(BaseModel):
     week_starts_on: int
     custom_start_date: Optional[date]
     created_at: datetime
+    version: int = 1
 
     class Config:
         from_attributes = True
@@ -81,6 +132,7 @@ class OnCallSlotRead(BaseModel):
     primary_person_id: int
     secondary_person_id: Optional[int] = None
     notes: Optional[str] = None
+    is_override: bool = False
 
     class Config:
         from_attributes = True
@@ -95,6 +147,9 @@ class OverrideRequest(BaseModel):
     secondary_person_id: Optional[int] = None
     notes: Optional[str] = None
 
+class BatchOverrideRequest(BaseModel):
+    overrides: List[OverrideRequest] = Field(..., min_length=1)
+
 # For team-level on-call dashboard
 class OnCallNowResponse(BaseModel):
     schedule_id: int
@@ -120,8 +175,101 @@ class SchedulePersonUsage(BaseModel):
 
 
 
+class ExportCacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class PoolConfig(BaseModel):
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    liveness: str
+    statement_timeout_ms: int
+    pgbouncer: bool
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_avg: float
+    wait_seconds_max: float
+
+
+class DbPoolStatus(BaseModel):
+    config: PoolConfig
+    sync: Optional[PoolStats] = None
+    async_: Optional[PoolStats] = Field(None, alias="async")
+
+    class Config:
+        populate_by_name = True
+
+
+class OutboxMessageRead(BaseModel):
+    id: int
+    channel: str
+    recipient: Optional[str] = None
+    subject: Optional[str] = None
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OutboxStatus(BaseModel):
+    counts: Dict[str, int]
+    oldest_pending_at: Optional[datetime] = None
+    dead: List[OutboxMessageRead]
+
+
 class BulkReassignRequest(BaseModel):
     from_person_id: int
     to_person_id: int
     scope: Literal["primary", "secondary", "both"] = "both"
 
+
+class SwapSlotsRequest(BaseModel):
+    slot_a: int
+    slot_b: int
+    scope: Literal["primary", "secondary", "both"] = "both"
+
+
+class RotateSlotsRequest(BaseModel):
+    """
+    Move assignments `offset` slots forward (negative: backward) within
+    from_slot..to_slot, wrapping at the ends. to_slot defaults to the last
+    slot, so {"from_slot": N} moves everyone from slot N on forward by one.
+    """
+    from_slot: int = Field(..., ge=1)
+    to_slot: Optional[int] = Field(None, ge=1)
+    offset: int = 1
+    scope: Literal["primary", "secondary", "both"] = "both"
+
+
+class ExchangePeopleRequest(BaseModel):
+    """Swap person_a and person_b wherever either appears in the slot range."""
+    person_a_id: int
+    person_b_id: int
+    from_slot: Optional[int] = Field(None, ge=1)
+    to_slot: Optional[int] = Field(None, ge=1)
+    scope: Literal["primary", "secondary", "both"] = "both"
+
+
+class SlotUpdateResult(BaseModel):
+    schedule_id: int
+    version: int
+    updated_slots: int
+
@@ -1,11 +1,17 @@
 # backend/app/seed.py
 
-from datetime import date
-from typing import List
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
 
 from .db import SessionLocal
-from .models_db import Person, Team, TeamMembership
+from .models_db import PTO, Person, Team, TeamMembership
 from .repositories_db import SchedulesRepositoryDB
+from .scheduler import PTOInterval, generate_many, merge_pto_intervals
 
 
 DEFAULT_PEOPLE = [
@@ -77,3 +83,237 @@ def seed_initial_data() -> None:
         raise
     finally:
         db.close()
+
+
+# ----- Synthetic organisation (load testing) -----
+
+FIRST_NAMES = [
+    "Aisha", "Ben", "Carlos", "Dana", "Elif", "Farah", "Goran", "Hana", "Ivan",
+    "Jin", "Kofi", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa",
+    "Sven", "Tariq", "Uma", "Victor", "Wen", "Ximena", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Abe", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Haddad",
+    "Ivanova", "Jensen", "Kim", "Lopez", "Mensah", "Novak", "Okafor", "Patel",
+    "Rossi", "Silva", "Tanaka", "Usman", "Weber", "Yilmaz", "Zhang",
+]
+TIME_ZONES = [
+    "America/New_York", "America/Los_Angeles", "Europe/London",
+    "Europe/Berlin", "Asia/Kolkata", "Asia/Tokyo", "Australia/Sydney",
+]
+
+
+def parse_length_distribution(spec: str) -> List[Tuple[int, float]]:
+    """Parse "1:50,3:25,5:15,10:10" into [(days, weight), ...]."""
+    dist = []
+    for part in spec.split(","):
+        days, _, weight = part.partition(":")
+        dist.append((int(days), float(weight or 1)))
+    if not dist or any(d <= 0 or w < 0 for d, w in dist):
+        raise ValueError(f"Invalid PTO length distribution: {spec!r}")
+    return dist
+
+
+def seed_synthetic_org(
+    teams: int = 20,
+    people_per_team: int = 8,
+    cross_team_ratio: float = 0.1,
+    pto_per_person_year: float = 3.0,
+    pto_lengths: Optional[List[Tuple[int, float]]] = None,
+    years: Optional[List[int]] = None,
+    rotation_days: int = 7,
+    prefix: str = "Synthetic",
+    seed: int = 42,
+) -> Dict[str, int]:
+    """
+    Generate an organisation at scale with bulk inserts.
+
+    - `teams` teams with `people_per_team` home members each
+    - `cross_team_ratio` of people also join one or two other teams
+    - per person and year, 0..2*pto_per_person_year PTO blocks with lengths
+      drawn from pto_lengths [(days, weight), ...]
+    - one schedule per team and year (generated on the process pool and
+      written through create_schedules_bulk, i.e. COPY on Postgres)
+
+    Rows go in with executemany INSERTs rather than ORM adds. Output is
+    deterministic for a given seed. Team names start with `prefix`, which
+    must not collide with existing teams. Returns row counts.
+    """
+    rng = random.Random(seed)
+    years = years or [date.today().year]
+    pto_lengths = pto_lengths or [(1, 50), (3, 25), (5, 15), (10, 10)]
+    lengths, weights = zip(*pto_lengths)
+
+    db = SessionLocal()
+    try:
+        print(f"🌱 Seeding synthetic org: {teams} teams x {people_per_team} people, years {years}...")
+
+        people_rows = []
+        for i in range(teams * people_per_team):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            people_rows.append(
+                {
+                    "name": f"{first} {last}",
+                    "email": f"{first}.{last}.{i}@example.com".lower(),
+                    "time_zone": rng.choice(TIME_ZONES),
+                }
+            )
+        person_ids = list(
+            db.scalars(
+                insert(Person).returning(Person.id, sort_by_parameter_order=True),
+                people_rows,
+            )
+        )
+
+        team_ids = list(
+            db.scalars(
+                insert(Team).returning(Team.id, sort_by_parameter_order=True),
+                [
+                    {"name": f"{prefix} Team {t + 1:04d}", "description": "Synthetic load-test team"}
+                    for t in range(teams)
+                ],
+            )
+        )
+
+        members_by_team: Dict[int, List[int]] = {}
+        for t, team_id in enumerate(team_ids):
+            members_by_team[team_id] = person_ids[
+                t * people_per_team : (t + 1) * people_per_team
+            ]
+        if teams > 1:
+            for pid in rng.sample(person_ids, int(len(person_ids) * cross_team_ratio)):
+                for team_id in rng.sample(team_ids, rng.randint(1, 2)):
+                    if pid not in members_by_team[team_id]:
+                        members_by_team[team_id].append(pid)
+        membership_rows = [
+            {"team_id": team_id, "person_id": pid}
+            for team_id, pids in members_by_team.items()
+            for pid in pids
+        ]
+        db.execute(insert(TeamMembership), membership_rows)
+
+        pto_rows = []
+        pto_by_person: Dict[int, List[PTOInterval]] = {}
+        max_blocks = int(round(2 * pto_per_person_year))
+        for pid in person_ids:
+            for year in years:
+                for _ in range(rng.randint(0, max_blocks)):
+                    start = date(year, 1, 1) + timedelta(days=rng.randint(0, 364))
+                    end = start + timedelta(days=rng.choices(lengths, weights)[0] - 1)
+                    pto_rows.append(
+                        {"person_id": pid, "start_date": start, "end_date": end, "reason": "Vacation"}
+                    )
+                    pto_by_person.setdefault(pid, []).append((start, end))
+        if pto_rows:
+            db.execute(insert(PTO), pto_rows)
+        db.commit()
+
+        jobs = []
+        keys = []
+        for team_id, pids in members_by_team.items():
+            for year in years:
+                year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+                team_pto = {}
+                for pid in pids:
+                    clipped = [
+                        (max(s, year_start), min(e, year_end))
+                        for s, e in pto_by_person.get(pid, ())
+                        if s <= year_end and e >= year_start
+                    ]
+                    if clipped:
+                        team_pto[pid] = merge_pto_intervals(clipped)
+                jobs.append(
+                    {
+                        "people_ids": pids,
+                        "year": year,
+                        "rotation_days": rotation_days,
+                        "pto_by_person": team_pto,
+                    }
+                )
+                keys.append((team_id, year))
+
+        entries = []
+        for (team_id, year), (slots, error) in zip(keys, generate_many(jobs)):
+            if error is not None:
+                print(f"❌ Generation failed for team {team_id}/{year}: {error}")
+                continue
+            entries.append(
+                {
+                    "team_id": team_id,
+                    "year": year,
+                    "rotation_days": rotation_days,
+                    "week_starts_on": 0,
+                    "custom_start_date": None,
+                    "slots": slots,
+                }
+            )
+        persisted = SchedulesRepositoryDB(db).create_schedules_bulk(entries)
+        for e, (schedule_id, error) in zip(entries, persisted):
+            if schedule_id is None:
+                print(f"❌ Persisting schedule failed for team {e['team_id']}/{e['year']}: {error}")
+        schedule_ids = [schedule_id for schedule_id, _ in persisted]
+
+        counts = {
+            "people": len(person_ids),
+            "teams": len(team_ids),
+            "memberships": len(membership_rows),
+            "pto": len(pto_rows),
+            "schedules": sum(1 for s in schedule_ids if s is not None),
+            "slots": sum(
+                len(e["slots"]) for e, s in zip(entries, schedule_ids) if s is not None
+            ),
+        }
+        print("✅ Synthetic seed complete: " + ", ".join(f"{v} {k}" for k, v in counts.items()))
+        return counts
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Synthetic seed failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    python -m app.seed                 # demo data (skipped if people exist)
+    python -m app.seed synthetic ...   # load-test scale, see --help
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.seed")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("demo", help="six people and one team (default)")
+    syn = sub.add_parser("synthetic", help="generate an organisation at scale")
+    syn.add_argument("--teams", type=int, default=20)
+    syn.add_argument("--people-per-team", type=int, default=8)
+    syn.add_argument("--cross-team-ratio", type=float, default=0.1,
+                     help="fraction of people who also join 1-2 other teams")
+    syn.add_argument("--pto-per-person-year", type=float, default=3.0,
+                     help="mean PTO blocks per person per year")
+    syn.add_argument("--pto-lengths", default="1:50,3:25,5:15,10:10",
+                     help="PTO length distribution as days:weight pairs")
+    syn.add_argument("--years", default=str(date.today().year),
+                     help="comma-separated years to generate schedules for")
+    syn.add_argument("--rotation-days", type=int, default=7)
+    syn.add_argument("--prefix", default="Synthetic", help="team name prefix")
+    syn.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.command == "synthetic":
+        t0 = time.perf_counter()
+        seed_synthetic_org(
+            teams=args.teams,
+            people_per_team=args.people_per_team,
+            cross_team_ratio=args.cross_team_ratio,
+            pto_per_person_year=args.pto_per_person_year,
+            pto_lengths=parse_length_distribution(args.pto_lengths),
+            years=[int(y) for y in args.years.split(",")],
+            rotation_days=args.rotation_days,
+            prefix=args.prefix,
+            seed=args.seed,
+        )
+        print(f"⏱️  {time.perf_counter() - t0:.1f}s")
+    else:
+        seed_initial_data()
+
+
+if __name__ == "__main__":
+    main()
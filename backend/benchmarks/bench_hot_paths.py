@@ -0,0 +1,307 @@
+"""
+Micro-benchmarks for the scheduler and repository hot paths:
+
+  generate     generate_slots per engine over people / rotation / PTO density
+  pto          PTORepositoryDB.list_for_team_year
+  persist      SchedulesRepositoryDB.create_schedule
+  export       render_export over iter_export_rows, per format
+  oncall_now   resolver-backed team / schedule lookups (cold and warm) and
+               the batched get_oncall_now_for_teams query
+
+Repository benchmarks run against DATABASE_URL from app.db unless
+BENCH_DATABASE_URL is set. Synthetic people, a team, PTO and schedules are
+created under a unique prefix and deleted again at the end. Data is seeded
+from --seed, so two runs see identical inputs.
+
+Results are written as JSON (--output) for benchmarks.compare:
+
+    cd backend
+    python -m benchmarks.bench_hot_paths --output base.json
+    git checkout my-branch
+    python -m benchmarks.bench_hot_paths --output head.json
+    python -m benchmarks.compare base.json head.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session
+
+from app.db import Base, engine as app_engine
+from app.exports import EXPORT_MEDIA_TYPES, render_export
+from app.models_db import PTO, OnCallSlot, Person, ScheduleDefinition, Team, TeamMembership
+from app.oncall_cache import oncall_resolver
+from app.repositories_db import PTORepositoryDB, SchedulesRepositoryDB
+from app.scheduler import GENERATION_ENGINES, generate_slots, merge_pto_intervals
+
+GENERATE_PEOPLE = (10, 100, 1000)
+GENERATE_ROTATIONS = (1, 7)
+GENERATE_PTO_DENSITIES = (0.0, 0.2, 0.5)
+
+
+def _timeit(
+    fn: Callable[[], object],
+    repeat: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict[str, float]:
+    """Run fn warmup + repeat times; setup (untimed) runs before each call."""
+    samples: List[float] = []
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+    }
+
+
+def _synthetic_pto(
+    rng: random.Random, person_ids: List[int], year: int, density: float
+) -> Dict[int, List[tuple]]:
+    """
+    Raw PTO blocks of 1-14 days per person covering roughly `density` of
+    the year.
+    """
+    pto: Dict[int, List[tuple]] = {}
+    if density <= 0:
+        return pto
+    year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+    for pid in person_ids:
+        day = year_start
+        while day <= year_end:
+            length = rng.randint(1, 14)
+            if rng.random() < density:
+                pto.setdefault(pid, []).append(
+                    (day, min(day + timedelta(days=length - 1), year_end))
+                )
+            day += timedelta(days=length)
+    return pto
+
+
+def bench_generate(rng: random.Random, repeat: int, engines: List[str]) -> Dict[str, dict]:
+    results = {}
+    year = date.today().year
+    for people in GENERATE_PEOPLE:
+        person_ids = list(range(1, people + 1))
+        for density in GENERATE_PTO_DENSITIES:
+            pto = {
+                pid: merge_pto_intervals(ivs)
+                for pid, ivs in _synthetic_pto(rng, person_ids, year, density).items()
+            }
+            for rotation in GENERATE_ROTATIONS:
+                for engine in engines:
+                    name = f"generate[engine={engine},people={people},rotation={rotation},pto={density}]"
+                    results[name] = _timeit(
+                        lambda: generate_slots(
+                            engine,
+                            None,
+                            people_ids=person_ids,
+                            year=year,
+                            rotation_days=rotation,
+                            pto_by_person=pto,
+                        ),
+                        repeat,
+                    )
+    return results
+
+
+class _Fixture:
+    """Synthetic team with members, PTO and a daily-rotation schedule."""
+
+    def __init__(self, engine, rng: random.Random, people: int, pto_density: float):
+        self.engine = engine
+        self.year = date.today().year
+        prefix = f"bench-{time.time_ns()}"
+        with Session(engine) as db:
+            persons = [
+                Person(name=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com")
+                for i in range(people)
+            ]
+            team = Team(name=prefix)
+            db.add_all(persons + [team])
+            db.flush()
+            self.team_id = team.id
+            self.person_ids = [p.id for p in persons]
+            db.add_all(TeamMembership(team_id=team.id, person_id=pid) for pid in self.person_ids)
+            db.add_all(
+                PTO(person_id=pid, start_date=s, end_date=e, reason="bench")
+                for pid, ivs in _synthetic_pto(rng, self.person_ids, self.year, pto_density).items()
+                for s, e in ivs
+            )
+            db.commit()
+
+            repo = SchedulesRepositoryDB(db)
+            self.schedule_id = repo.create_schedule(
+                team_id=self.team_id,
+                year=self.year,
+                rotation_days=1,
+                week_starts_on=0,
+                custom_start_date=date(self.year, 1, 1),
+                person_ids=self.person_ids,
+                pto_by_person=PTORepositoryDB(db).list_for_team_year(self.team_id, self.year),
+            )
+
+    def cleanup(self) -> None:
+        with Session(self.engine) as db:
+            schedule_ids = select(ScheduleDefinition.id).where(
+                ScheduleDefinition.team_id == self.team_id
+            )
+            db.execute(delete(OnCallSlot).where(OnCallSlot.schedule_id.in_(schedule_ids)))
+            db.execute(delete(ScheduleDefinition).where(ScheduleDefinition.team_id == self.team_id))
+            db.execute(delete(PTO).where(PTO.person_id.in_(self.person_ids)))
+            db.execute(delete(TeamMembership).where(TeamMembership.team_id == self.team_id))
+            db.execute(delete(Team).where(Team.id == self.team_id))
+            db.execute(delete(Person).where(Person.id.in_(self.person_ids)))
+            db.commit()
+        oncall_resolver.clear()
+
+
+def bench_repositories(fx: _Fixture, repeat: int) -> Dict[str, dict]:
+    results = {}
+    with Session(fx.engine) as db:
+        pto_repo = PTORepositoryDB(db)
+        sched_repo = SchedulesRepositoryDB(db)
+        pto_by_person = pto_repo.list_for_team_year(fx.team_id, fx.year)
+
+        results["pto.list_for_team_year"] = _timeit(
+            lambda: pto_repo.list_for_team_year(fx.team_id, fx.year), repeat
+        )
+
+        for fmt in EXPORT_MEDIA_TYPES:
+            results[f"export[format={fmt}]"] = _timeit(
+                lambda: "".join(
+                    render_export(
+                        fx.schedule_id, fmt, sched_repo.iter_export_rows(fx.schedule_id)
+                    )
+                ),
+                repeat,
+            )
+
+        results["oncall_now.team[cold]"] = _timeit(
+            lambda: sched_repo.get_oncall_now_for_team(fx.team_id, fx.year),
+            repeat,
+            setup=oncall_resolver.clear,
+        )
+        results["oncall_now.team[warm]"] = _timeit(
+            lambda: sched_repo.get_oncall_now_for_team(fx.team_id, fx.year), repeat
+        )
+        results["oncall_now.schedule[cold]"] = _timeit(
+            lambda: sched_repo.get_oncall_now_for_schedule(fx.schedule_id),
+            repeat,
+            setup=oncall_resolver.clear,
+        )
+        results["oncall_now.teams_batch"] = _timeit(
+            lambda: sched_repo.get_oncall_now_for_teams([fx.team_id], fx.year), repeat
+        )
+
+        # last: every run adds a newer schedule for the team, which would
+        # change what the lookups above resolve to
+        for rotation in (1, 7):
+            results[f"persist.create_schedule[rotation={rotation}]"] = _timeit(
+                lambda: sched_repo.create_schedule(
+                    team_id=fx.team_id,
+                    year=fx.year,
+                    rotation_days=rotation,
+                    week_starts_on=0,
+                    custom_start_date=None,
+                    person_ids=fx.person_ids,
+                    pto_by_person=pto_by_person,
+                ),
+                repeat,
+            )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--people", type=int, default=50, help="fixture team size")
+    parser.add_argument("--pto-density", type=float, default=0.2)
+    parser.add_argument(
+        "--engines",
+        default="round_robin",
+        help=f"comma-separated, from: {', '.join(GENERATION_ENGINES)}",
+    )
+    parser.add_argument(
+        "--only",
+        choices=["generate", "repositories"],
+        help="run one group only",
+    )
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    engines = [e for e in args.engines.split(",") if e]
+    unknown = set(engines) - set(GENERATION_ENGINES)
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(sorted(unknown))}")
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    engine = create_engine(url, future=True) if url else app_engine
+    if url:
+        Base.metadata.create_all(engine)
+
+    # one generator per group so --only does not change the other's data
+    results: Dict[str, dict] = {}
+    if args.only in (None, "generate"):
+        results.update(bench_generate(random.Random(args.seed), args.repeat, engines))
+    if args.only in (None, "repositories"):
+        fx = _Fixture(engine, random.Random(args.seed), args.people, args.pto_density)
+        try:
+            results.update(bench_repositories(fx, args.repeat))
+        finally:
+            fx.cleanup()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dialect": f"{engine.dialect.name}+{engine.dialect.driver}",
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    width = max(len(name) for name in results)
+    for name, r in results.items():
+        print(f"{name:<{width}}  median {r['median_ms']:>10.3f} ms  min {r['min_ms']:>10.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
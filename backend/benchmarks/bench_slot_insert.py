@@ -0,0 +1,110 @@
+"""
+Slot persistence benchmark: per-row ORM adds (the old create_schedule path)
+vs SchedulesRepositoryDB._insert_slots (Core executemany / Postgres COPY).
+
+Runs against DATABASE_URL from app.db unless BENCH_DATABASE_URL is set.
+Everything happens inside one transaction that is rolled back at the end,
+so it is safe to point at a dev database.
+
+    cd backend
+    python -m benchmarks.bench_slot_insert --years 5 --rotation-days 1
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base, engine as app_engine
+from app.models_db import OnCallSlot, Person, ScheduleDefinition, Team
+from app.repositories_db import SchedulesRepositoryDB
+from app.scheduler import generate_oncall_slots
+
+
+def _make_slots(person_ids, years, rotation_days):
+    slots = []
+    for year in range(2030, 2030 + years):
+        for s in generate_oncall_slots(person_ids, year, rotation_days=rotation_days):
+            slots.append(dict(s, slot=len(slots) + 1))
+    return slots
+
+
+def _orm_insert(db: Session, schedule_id: int, raw_slots) -> None:
+    for s in raw_slots:
+        db.add(
+            OnCallSlot(
+                schedule_id=schedule_id,
+                slot=s["slot"],
+                start=s["start"],
+                end=s["end"],
+                primary_person_id=s["primary_person_id"],
+                secondary_person_id=s["secondary_person_id"],
+            )
+        )
+    db.flush()
+
+
+def _bulk_insert(db: Session, schedule_id: int, raw_slots) -> None:
+    SchedulesRepositoryDB(db)._insert_slots(schedule_id, raw_slots)
+
+
+def _new_schedule(db: Session, team_id: int) -> int:
+    definition = ScheduleDefinition(team_id=team_id, year=2030, rotation_days=1)
+    db.add(definition)
+    db.flush()
+    return definition.id
+
+
+def run(engine, years: int, rotation_days: int, people: int, repeat: int) -> dict:
+    results = {}
+    with Session(engine) as db:
+        try:
+            persons = [Person(name=f"bench-{i}") for i in range(people)]
+            team = Team(name=f"bench-team-{time.time_ns()}")
+            db.add_all(persons + [team])
+            db.flush()
+            raw_slots = _make_slots([p.id for p in persons], years, rotation_days)
+
+            for label, fn in (("orm_add", _orm_insert), ("bulk", _bulk_insert)):
+                best = float("inf")
+                for _ in range(repeat):
+                    schedule_id = _new_schedule(db, team.id)
+                    t0 = time.perf_counter()
+                    fn(db, schedule_id, raw_slots)
+                    best = min(best, time.perf_counter() - t0)
+                    db.expunge_all()
+                results[label] = {
+                    "rows": len(raw_slots),
+                    "seconds": round(best, 4),
+                    "rows_per_sec": round(len(raw_slots) / best),
+                }
+        finally:
+            db.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rotation-days", type=int, default=1)
+    parser.add_argument("--people", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    engine = create_engine(url, future=True) if url else app_engine
+    if url:
+        Base.metadata.create_all(engine)
+
+    results = run(engine, args.years, args.rotation_days, args.people, args.repeat)
+    print(f"dialect={engine.dialect.name}+{engine.dialect.driver}")
+    for label, r in results.items():
+        print(f"{label:>8}: {r['rows']} rows in {r['seconds']}s -> {r['rows_per_sec']} rows/sec")
+    speedup = results["bulk"]["rows_per_sec"] / results["orm_add"]["rows_per_sec"]
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
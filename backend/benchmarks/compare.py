@@ -0,0 +1,73 @@
+"""
+Compare two bench_hot_paths JSON reports case by case.
+
+A case is a regression when its median got slower by more than
+--threshold (relative, default 10%). Exits 1 if any case regressed, so it
+can gate CI:
+
+    python -m benchmarks.compare base.json head.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    base: Dict[str, dict], head: Dict[str, dict], threshold: float, metric: str = "median_ms"
+) -> Tuple[List[tuple], List[str]]:
+    """
+    Returns ([(case, base_ms, head_ms, change, status), ...], regressed cases)
+    for the cases present in both reports. change is head / base - 1.
+    """
+    rows = []
+    regressed = []
+    for name in sorted(base.keys() & head.keys()):
+        b = base[name][metric]
+        h = head[name][metric]
+        change = (h / b - 1) if b else 0.0
+        if change > threshold:
+            status = "REGRESSION"
+            regressed.append(name)
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = ""
+        rows.append((name, b, h, change, status))
+    return rows, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--metric", default="median_ms", choices=["median_ms", "min_ms", "mean_ms"])
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    rows, regressed = compare(base["results"], head["results"], args.threshold, args.metric)
+
+    print(f"base {base['meta'].get('commit')}  head {head['meta'].get('commit')}  ({args.metric})")
+    width = max((len(r[0]) for r in rows), default=4)
+    for name, b, h, change, status in rows:
+        print(f"{name:<{width}}  {b:>10.3f}  {h:>10.3f}  {change:>+8.1%}  {status}")
+    for label, names in (
+        ("only in base", base["results"].keys() - head["results"].keys()),
+        ("only in head", head["results"].keys() - base["results"].keys()),
+    ):
+        if names:
+            print(f"{label}: {len(names)} case(s), not compared")
+
+    if regressed:
+        print(f"{len(regressed)} regression(s) over {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Closed-loop HTTP load test for the read endpoints.
+
+Runs C concurrent clients against a running API for a fixed duration at
+each concurrency level and reports requests/sec and latency percentiles.
+Compare a sync (threadpool) route with an async one to see where the
+threadpool (40 threads by default) stops scaling:
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test --path /teams/1/oncall-now --path /people/1 \\
+        --concurrency 8,32,64,128,256
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+
+async def _worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: List[float], errors: List[int]):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            if r.status_code >= 500:
+                errors.append(r.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run_level(base_url: str, path: str, concurrency: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors: List[int] = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await client.get(path)  # warm caches / connections
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(_worker(client, path, deadline, latencies, errors) for _ in range(concurrency))
+        )
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(pct(0.50), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "errors": len(errors),
+    }
+
+
+async def main_async(args) -> None:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    print(f"{'path':<32} {'conc':>5} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for path in args.path:
+        for c in levels:
+            r = await run_level(args.base_url, path, c, args.seconds)
+            print(
+                f"{r['path']:<32} {r['concurrency']:>5} {r['rps']:>9} "
+                f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>6}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP load test for read endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", required=True)
+    parser.add_argument("--concurrency", default="8,32,64,128,256")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()